@@ -0,0 +1,88 @@
+import functools
+
+from api.cache import response_cache
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import HttpResponse
+from rest_framework.exceptions import APIException
+
+# Действие -> метод вьюсета с пространствами имен кэша для него.
+CACHED_ACTIONS = {
+    'list': 'get_list_namespaces',
+    'retrieve': 'get_retrieve_namespaces',
+}
+
+
+class AsyncCachedReadMixin:
+    """Под ASGI чтение из кэша ответов не занимает поток и БД.
+
+    В Django 3.2 нет асинхронного ORM (aget, acount и async for появились
+    в 4.1), а DRF 3.12 не поддерживает асинхронные view. Поэтому при
+    ASYNC_VIEWS вьюсет отдается асинхронной функцией: анонимные GET
+    list и retrieve в JSON сначала проверяются по кэшу ответов прямо
+    в цикле событий, и 304 или попадание в кэш возвращаются без потока.
+    Промахи, запись и запросы с токеном выполняет обычный view в потоке
+    запроса, как в синхронном режиме.
+    """
+
+    @classmethod
+    def as_view(cls, actions=None, **initkwargs):
+        view = super().as_view(actions, **initkwargs)
+        if not settings.ASYNC_VIEWS:
+            return view
+        sync_view = sync_to_async(view)
+
+        async def async_view(request, *args, **kwargs):
+            if (request.method == 'GET'
+                    and actions.get('get') in CACHED_ACTIONS
+                    and 'HTTP_AUTHORIZATION' not in request.META):
+                probe = functools.partial(
+                    cls.probe_cache, actions, initkwargs, request, args,
+                    kwargs
+                )
+                if response_cache.backend.blocking:
+                    # Поток без соединения с БД, не поток запроса.
+                    probe = sync_to_async(probe, thread_sensitive=False)
+                    response = await probe()
+                else:
+                    response = probe()
+                if response is not None:
+                    return response
+            return await sync_view(request, *args, **kwargs)
+
+        return functools.update_wrapper(async_view, view)
+
+    @classmethod
+    def probe_cache(cls, actions, initkwargs, request, args, kwargs):
+        """Ответ из кэша как у синхронного view или None."""
+        self = cls(**initkwargs)
+        self.action_map = actions
+        self.args = args
+        self.kwargs = kwargs
+        self.request = self.initialize_request(request, *args, **kwargs)
+        self.headers = self.default_response_headers
+        try:
+            self.format_kwarg = self.get_format_suffix(**kwargs)
+            renderer, media_type = self.perform_content_negotiation(
+                self.request
+            )
+        except APIException:
+            return None
+        if renderer.format != 'json':
+            return None
+        self.request.accepted_renderer = renderer
+        self.request.accepted_media_type = media_type
+        namespaces = getattr(self, CACHED_ACTIONS[self.action])()
+        response = self.lookup_cached_response(namespaces, self.request)[-1]
+        if response is None:
+            return None
+        response = self.finalize_response(self.request, response)
+        if not hasattr(response, 'render'):
+            return response
+        # Отдаем готовый HttpResponse: отложенный render Django выполнил
+        # бы в потоке.
+        rendered = HttpResponse(response.render().content,
+                                status=response.status_code)
+        for header, value in response.items():
+            rendered[header] = value
+        return rendered
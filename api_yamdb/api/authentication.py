@@ -0,0 +1,114 @@
+import logging
+import time
+
+from api.cache import CacheError, create_backend
+from django.conf import settings
+from django.utils.functional import SimpleLazyObject, cached_property
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+from reviews.models import User
+
+logger = logging.getLogger(__name__)
+
+# Поля пользователя, которые копируются в токен и влияют на доступ.
+AUTH_FIELDS = ('username', 'role', 'is_staff', 'is_superuser', 'is_active')
+
+auth_cache = SimpleLazyObject(lambda: create_backend(settings.AUTH_CACHE))
+
+
+def get_access_token(user):
+    """Выпускаем access-токен с ролью, чтобы не читать пользователя из БД."""
+    token = AccessToken.for_user(user)
+    for field in AUTH_FIELDS:
+        token[field] = getattr(user, field)
+    token['iat'] = int(token.current_time.timestamp())
+    return token
+
+
+def changed_key(user_id):
+    return f'auth:changed:{user_id}'
+
+
+def mark_auth_changed(user_id):
+    """Запоминаем время изменения прав: старые токены идут в БД.
+
+    Запись живет столько же, сколько access-токен: токены, выпущенные
+    до изменения, к ее истечению уже недействительны.
+    """
+    try:
+        auth_cache.set(
+            changed_key(user_id), time.time(),
+            int(api_settings.ACCESS_TOKEN_LIFETIME.total_seconds()),
+        )
+    except CacheError as error:
+        # Права администратора все равно проверяются по БД (load_db_user).
+        logger.error('Метка изменения прав %s не сохранена: %s',
+                     user_id, error)
+
+
+class RoleTokenUser(TokenUser):
+    """Пользователь, собранный из claims токена, с ролями как у User."""
+
+    @cached_property
+    def role(self):
+        return self.token.get('role', User.USER)
+
+    @property
+    def is_admin(self):
+        return self.role == User.ADMIN
+
+    @property
+    def is_moderator(self):
+        return self.role == User.MODERATOR
+
+    @property
+    def is_user(self):
+        return self.role == User.USER
+
+
+def load_db_user(request):
+    """Заменяем пользователя из claims токена на пользователя из БД.
+
+    Права администратора проверяются только так: метка об их изменении
+    может не дойти до хранилища, например при QuerySet.update().
+    """
+    if isinstance(request.user, RoleTokenUser):
+        request.user = JWTAuthentication().get_user(request.user.token)
+    return request.user
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """JWT-аутентификация без запроса пользователя на чтение.
+
+    Для безопасных методов пользователь собирается из claims токена,
+    если AUTH_CACHE общий для процессов: иначе метку об изменении прав
+    видел бы только процесс, который ее поставил. Если права менялись
+    после выпуска токена, а также для запросов на запись пользователь
+    читается из БД как обычно.
+    """
+
+    def authenticate(self, request):
+        self.safe_method = request.method in SAFE_METHODS
+        return super().authenticate(request)
+
+    def get_user(self, validated_token):
+        if (self.safe_method and auth_cache.shared
+                and self.is_fresh(validated_token)):
+            return RoleTokenUser(validated_token)
+        return super().get_user(validated_token)
+
+    def is_fresh(self, validated_token):
+        if 'iat' not in validated_token:
+            return False
+        if not validated_token.get('is_active', False):
+            return False
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        try:
+            changed = auth_cache.get(changed_key(user_id))
+        except CacheError as error:
+            logger.warning('Метки изменения прав недоступны: %s', error)
+            return False
+        return changed is None or validated_token['iat'] > changed
@@ -0,0 +1,344 @@
+import functools
+import hashlib
+import logging
+import pickle
+import threading
+import time
+
+from api.replicas import replica_may_lag
+from django.conf import settings
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+from django.utils.cache import get_conditional_response
+from django.utils.functional import SimpleLazyObject
+from django.utils.http import http_date, quote_etag
+from django.utils.module_loading import import_string
+from rest_framework.response import Response
+
+logger = logging.getLogger(__name__)
+
+# Блокировки счетчиков по location: LocMemCache с тем же location общий.
+_locks = {}
+
+
+class CacheError(Exception):
+    """Хранилище недоступно; вызывающий код работает без него."""
+
+
+def client_errors(method):
+    """Ошибки клиента Redis (нет памяти, нет связи) - CacheError."""
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        try:
+            return method(*args, **kwargs)
+        except Exception as error:
+            raise CacheError(error) from error
+    return wrapper
+
+
+class LocMemBackend:
+    """Хранилище в памяти процесса на основе LocMemCache из Django.
+
+    LocMemCache вытесняет записи сверх MAX_ENTRIES, в том числе версии:
+    ResponseCache начинает потерянную версию с текущего времени.
+    """
+    # Обращения не ждут сети, их можно делать прямо в цикле событий.
+    blocking = False
+    # У каждого процесса свое хранилище.
+    shared = False
+
+    def __init__(self, location, options):
+        self.cache = LocMemCache(location, {
+            'OPTIONS': {'MAX_ENTRIES': options.get('MAX_ENTRIES', 10000)},
+        })
+        self.lock = _locks.setdefault(location, threading.Lock())
+
+    def get(self, key):
+        return self.cache.get(key)
+
+    def get_many(self, keys):
+        values = self.cache.get_many(keys)
+        return [values.get(key) for key in keys]
+
+    def set(self, key, value, timeout):
+        self.cache.set(key, value, timeout)
+
+    def get_counters(self, keys):
+        return [value or 0 for value in self.get_many(keys)]
+
+    def add_counter(self, key, value, timeout):
+        """Записываем счетчик, если его нет; возвращаем значение
+        в хранилище."""
+        with self.lock:
+            self.cache.add(key, value, timeout)
+            return self.cache.get(key, value)
+
+    def advance_counter(self, key, value, timeout):
+        """Записываем value, но не меньше прежнего значения + 1."""
+        with self.lock:
+            value = max(value, self.cache.get(key, 0) + 1)
+            self.cache.set(key, value, timeout)
+            return value
+
+    def incr(self, key, timeout=None):
+        self.cache.add(key, 0, timeout)
+        try:
+            return self.cache.incr(key)
+        except ValueError:
+            # Счетчик вытеснен между add и incr.
+            self.cache.set(key, 1, timeout)
+            return 1
+
+    def clear(self):
+        self.cache.clear()
+
+
+class RedisBackend:
+    """Хранилище в Redis, общее для всех процессов приложения.
+
+    Клиент создается классом из OPTIONS['CLIENT_CLASS'] через from_url,
+    по умолчанию redis.Redis. В тестах подставляется локальная замена.
+    Все ключи, кроме счетчиков статистики, со сроком жизни, поэтому
+    при политике volatile-* Redis не упирается в maxmemory. Ошибки
+    клиента выбрасываются как CacheError.
+    """
+    blocking = True
+    shared = True
+
+    def __init__(self, location, options):
+        client_class = import_string(
+            options.get('CLIENT_CLASS', 'redis.Redis')
+        )
+        self.client = client_class.from_url(location)
+
+    @client_errors
+    def get(self, key):
+        value = self.client.get(key)
+        return None if value is None else pickle.loads(value)
+
+    @client_errors
+    def get_many(self, keys):
+        return [None if value is None else pickle.loads(value)
+                for value in self.client.mget(keys)]
+
+    @client_errors
+    def set(self, key, value, timeout):
+        self.client.set(key, pickle.dumps(value), ex=timeout)
+
+    @client_errors
+    def get_counters(self, keys):
+        return [int(value or 0) for value in self.client.mget(keys)]
+
+    @client_errors
+    def add_counter(self, key, value, timeout):
+        self.client.set(key, value, ex=timeout, nx=True)
+        return int(self.client.get(key) or value)
+
+    @client_errors
+    def advance_counter(self, key, value, timeout):
+        # Параллельные вызовы могут записать значения в обратном порядке:
+        # версия все равно станет новой.
+        value = max(value, int(self.client.get(key) or 0) + 1)
+        self.client.set(key, value, ex=timeout)
+        return value
+
+    @client_errors
+    def incr(self, key, timeout=None):
+        value = self.client.incr(key)
+        if timeout is not None and value == 1:
+            self.client.expire(key, timeout)
+        return value
+
+    @client_errors
+    def clear(self):
+        self.client.flushdb()
+
+
+def now_micros():
+    return int(time.time() * 1000000)
+
+
+class ResponseCache:
+    """Кэш сериализованных ответов с версиями пространств имен.
+
+    Ключ ответа включает версии пространств, от которых он зависит.
+    Инвалидация увеличивает версию, и старые записи больше не читаются.
+    """
+
+    def __init__(self, backend, timeout, version_timeout):
+        self.backend = backend
+        self.timeout = timeout
+        self.version_timeout = version_timeout
+
+    def versions(self, namespaces):
+        """Версии пространств - время их последней инвалидации в мкс.
+
+        У версий есть срок жизни, хранилище может их и вытеснить.
+        Потерянная версия начинается с текущего времени: такого
+        значения у пространства еще не было, и ключи ответов и ETag
+        не совпадут с прежними.
+        """
+        keys = [f'version:{namespace}' for namespace in namespaces]
+        versions = self.backend.get_counters(keys)
+        for index, version in enumerate(versions):
+            if not version:
+                versions[index] = self.backend.add_counter(
+                    keys[index], now_micros(), self.version_timeout
+                )
+        return versions
+
+    def last_modified(self, versions):
+        """Время последней инвалидации пространств в секундах."""
+        return max(versions) // 1000000
+
+    def make_key(self, request, versions):
+        query = sorted(request.query_params.lists())
+        source = repr((versions, request.get_host(), request.path, query))
+        return 'response:' + hashlib.sha1(source.encode()).hexdigest()
+
+    def get(self, key):
+        data = self.backend.get(key)
+        self.backend.incr('stats:hits' if data is not None
+                          else 'stats:misses')
+        return data
+
+    def set(self, key, data):
+        self.backend.set(key, data, self.timeout)
+
+    def bump(self, namespaces):
+        now = now_micros()
+        try:
+            for namespace in namespaces:
+                self.backend.advance_counter(
+                    f'version:{namespace}', now, self.version_timeout
+                )
+        except CacheError as error:
+            # Запись в БД не откатываем: версии без хранилища не читаются.
+            logger.warning('Кэш ответов не сброшен: %s', error)
+
+    def invalidate(self, *namespaces):
+        # Повторяем после коммита: ответ, закэшированный до коммита
+        # параллельным запросом, содержит старые данные.
+        self.bump(namespaces)
+        transaction.on_commit(lambda: self.bump(namespaces))
+
+    def stats(self):
+        hits, misses = self.backend.get_counters(
+            ['stats:hits', 'stats:misses']
+        )
+        return {'hits': hits, 'misses': misses}
+
+
+def create_backend(config):
+    return import_string(config['BACKEND'])(
+        config.get('LOCATION', ''), config.get('OPTIONS', {})
+    )
+
+
+def create_response_cache():
+    config = settings.RESPONSE_CACHE
+    return ResponseCache(create_backend(config), config.get('TIMEOUT', 300),
+                         config.get('VERSION_TIMEOUT', 86400))
+
+
+response_cache = SimpleLazyObject(create_response_cache)
+
+
+def invalidate_object(namespace, pk=None):
+    """Сбрасываем списки пространства и, если указан pk, его объект."""
+    namespaces = [f'{namespace}:list']
+    if pk is not None:
+        namespaces.append(f'{namespace}:{pk}')
+    response_cache.invalidate(*namespaces)
+
+
+class CachedResponseMixin:
+    """Отдаем GET-ответы из кэша, пока не изменились их данные.
+
+    ETag и Last-Modified считаются по версиям пространств имен, поэтому
+    на условный запрос 304 отдается до обращения к БД и сериализаторам.
+    С общим хранилищем они одинаковы во всех процессах.
+    """
+    cache_namespace = None
+
+    def lookup_cached_response(self, namespaces, request):
+        """Ответ без обращения к БД: 304 или попадание в кэш.
+
+        Возвращаем (ключ, ETag, Last-Modified, ответ или None); если
+        хранилище недоступно, ключ тоже None.
+        """
+        try:
+            return self.lookup_in_cache(namespaces, request)
+        except CacheError as error:
+            logger.warning('Кэш ответов недоступен: %s', error)
+            return None, None, None, None
+
+    def lookup_in_cache(self, namespaces, request):
+        versions = response_cache.versions(namespaces)
+        key = response_cache.make_key(request, versions)
+        etag = quote_etag(hashlib.sha1(
+            f'{key}:{request.accepted_renderer.format}'.encode()
+        ).hexdigest())
+        last_modified = response_cache.last_modified(versions)
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            data = response_cache.get(key)
+            if data is not None:
+                response = self.add_validators(
+                    Response(data, headers={'X-Cache': 'HIT'}),
+                    etag, last_modified
+                )
+        return key, etag, last_modified, response
+
+    def add_validators(self, response, etag, last_modified):
+        if response.status_code == 200:
+            response['ETag'] = etag
+            if last_modified is not None:
+                response['Last-Modified'] = http_date(last_modified)
+        return response
+
+    def cached_response(self, handler, namespaces, request, *args, **kwargs):
+        key, etag, last_modified, response = self.lookup_cached_response(
+            namespaces, request
+        )
+        if response is not None:
+            return response
+        response = handler(request, *args, **kwargs)
+        response['X-Cache'] = 'MISS'
+        if key is None or replica_may_lag(last_modified):
+            # Реплика могла еще не получить последнюю запись: такой ответ
+            # не кэшируем и не помечаем текущей версией.
+            return response
+        if response.status_code == 200:
+            try:
+                response_cache.set(key, response.data)
+            except CacheError as error:
+                logger.warning('Кэш ответов недоступен: %s', error)
+        return self.add_validators(response, etag, last_modified)
+
+
+class CachedListMixin(CachedResponseMixin):
+
+    def get_list_namespaces(self):
+        return (self.cache_namespace, f'{self.cache_namespace}:list')
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(
+            super().list, self.get_list_namespaces(),
+            request, *args, **kwargs
+        )
+
+
+class CachedRetrieveMixin(CachedResponseMixin):
+
+    def get_retrieve_namespaces(self):
+        pk = self.kwargs[self.lookup_url_kwarg or self.lookup_field]
+        return (self.cache_namespace, f'{self.cache_namespace}:{pk}')
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(
+            super().retrieve, self.get_retrieve_namespaces(),
+            request, *args, **kwargs
+        )
@@ -0,0 +1,25 @@
+from django.conf import settings
+from django.core.checks import Error, register
+from django.utils.module_loading import import_string
+
+# Хранилища, которые должны быть общими для процессов приложения.
+SHARED_CACHES = ('AUTH_CACHE', 'RESPONSE_CACHE')
+
+
+@register()
+def check_shared_caches(app_configs, **kwargs):
+    """При SHARED_CACHE_REQUIRED хранилища в памяти процесса запрещены:
+    каждый процесс видел бы только свои счетчики и метки."""
+    if not settings.SHARED_CACHE_REQUIRED:
+        return []
+    errors = []
+    for name in SHARED_CACHES:
+        backend = getattr(settings, name)['BACKEND']
+        if not import_string(backend).shared:
+            errors.append(Error(
+                f'{name} использует {backend}, а он не общий для процессов',
+                hint=f'Укажите {name}_BACKEND=api.cache.RedisBackend и '
+                     f'{name}_LOCATION.',
+                id='api.E001',
+            ))
+    return errors
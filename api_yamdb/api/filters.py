@@ -1,10 +1,11 @@
 import django_filters as filters
+from api.search import rank_by_similarity, reject_cursor_mode
 from reviews.models import Title
 
 
 class TitleFilter(filters.FilterSet):
     name = filters.CharFilter(
-        field_name='name', lookup_expr='contains'
+        field_name='name', method='filter_name'
     )
     category = filters.CharFilter(
         field_name='category__slug', lookup_expr='exact'
@@ -16,3 +17,11 @@ class TitleFilter(filters.FilterSet):
     class Meta:
         model = Title
         fields = ['name', 'category', 'genre', 'year']
+
+    def filter_name(self, queryset, name, value):
+        # explain_filters строит фильтр без запроса.
+        if self.request is not None:
+            reject_cursor_mode(self.request)
+        return rank_by_similarity(
+            queryset.filter(name__contains=value), 'name', value
+        )
@@ -0,0 +1,192 @@
+import json
+import math
+import time
+
+from api.cache import response_cache
+from django.contrib.auth.tokens import default_token_generator
+from django.core.management import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client, override_settings
+from reviews.models import Comment, Genre, Review, User
+from reviews.seed import seed_catalog, seed_reviews
+
+
+def percentile(values, percent):
+    """Перцентиль по ближайшему рангу из отсортированного списка."""
+    return values[max(math.ceil(len(values) * percent / 100) - 1, 0)]
+
+
+def pick(items, number):
+    return items[number % len(items)]
+
+
+class QueryCounter:
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class Command(BaseCommand):
+    help = ('Нагрузочный прогон основных эндпоинтов тестовым клиентом '
+            'на синтетических данных; результат в JSON.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--titles', type=int, default=500)
+        parser.add_argument('--categories', type=int, default=10)
+        parser.add_argument('--genres', type=int, default=20)
+        parser.add_argument('--users', type=int, default=50)
+        parser.add_argument('--reviews-per-title', type=int, default=5)
+        parser.add_argument('--comments-per-review', type=int, default=2)
+        parser.add_argument(
+            '--requests', type=int, default=200,
+            help='Число замеряемых запросов на сценарий.',
+        )
+        parser.add_argument(
+            '--warmup', type=int, default=10,
+            help='Число запросов до замера.',
+        )
+        parser.add_argument(
+            '--cold', action='store_true',
+            help='Очищать кэш ответов перед каждым запросом.',
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--output', help='Файл для JSON; по умолчанию stdout.',
+        )
+
+    def handle(self, *args, **options):
+        if options['requests'] < 1 or options['titles'] < 1:
+            raise CommandError('Нужны хотя бы один запрос и произведение')
+        self.options = options
+        # Ограничения частоты и отправка писем исказили бы замер
+        # регистрации и выдачи токена.
+        with override_settings(
+            ALLOWED_HOSTS=['testserver'], AUTH_THROTTLES={},
+            EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+        ), transaction.atomic():
+            self.seed()
+            report = {
+                'dataset': {
+                    name: options[name] for name in (
+                        'titles', 'categories', 'genres', 'users',
+                        'reviews_per_title', 'comments_per_review', 'seed',
+                    )
+                },
+                'database': connection.vendor,
+                'cold': options['cold'],
+                'scenarios': {
+                    name: self.run(prepare)
+                    for name, prepare in self.get_scenarios()
+                },
+            }
+            transaction.set_rollback(True)
+        output = json.dumps(report, ensure_ascii=False, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                file.write(output + '\n')
+        else:
+            self.stdout.write(output)
+
+    def seed(self):
+        options = self.options
+        title_ids = seed_catalog(
+            titles=options['titles'], categories=options['categories'],
+            genres=options['genres'], seed=options['seed'],
+        )
+        seed_reviews(
+            title_ids, reviews_per_title=options['reviews_per_title'],
+            comments_per_review=options['comments_per_review'],
+            users=options['users'], seed=options['seed'],
+        )
+        self.title_ids = list(title_ids)
+        self.review_ids = list(Review.objects.filter(
+            title_id__in=self.title_ids
+        ).order_by('pk').values_list('title_id', 'pk'))
+        self.genres = list(Genre.objects.filter(
+            titles__in=self.title_ids
+        ).distinct().values_list('slug', flat=True))
+        self.commented = list(Comment.objects.filter(
+            reviews_id__in=[pk for _, pk in self.review_ids]
+        ).order_by('reviews_id').values_list(
+            'reviews__title_id', 'reviews_id'
+        ).distinct())
+        self.client = Client()
+
+    def get_scenarios(self):
+        """Сценарии: имя и метод, который по номеру запроса готовит
+        (метод, путь, тело) вне замера."""
+        names = ['titles', 'titles_filtered', 'title', 'reviews',
+                 'comments', 'signup', 'token']
+        if not self.genres:
+            names.remove('titles_filtered')
+        if not self.commented:
+            names.remove('comments')
+        return [(name, getattr(self, f'request_{name}')) for name in names]
+
+    def request_titles(self, number):
+        return 'get', '/api/v1/titles/', None
+
+    def request_titles_filtered(self, number):
+        return 'get', '/api/v1/titles/', {'genre': pick(self.genres, number)}
+
+    def request_title(self, number):
+        return 'get', f'/api/v1/titles/{pick(self.title_ids, number)}/', None
+
+    def request_reviews(self, number):
+        title_id = pick(self.title_ids, number)
+        return 'get', f'/api/v1/titles/{title_id}/reviews/', None
+
+    def request_comments(self, number):
+        title_id, review_id = pick(self.commented, number)
+        return 'get', (f'/api/v1/titles/{title_id}/reviews/'
+                       f'{review_id}/comments/'), None
+
+    def request_signup(self, number):
+        username = f'bench-signup-{number}'
+        return 'post', '/api/v1/auth/signup/', {
+            'username': username, 'email': f'{username}@yamdb.fake'
+        }
+
+    def request_token(self, number):
+        user = User.objects.create(
+            username=f'bench-token-{number}',
+            email=f'bench-token-{number}@yamdb.fake',
+        )
+        return 'post', '/api/v1/auth/token/', {
+            'username': user.username,
+            'confirmation_code': default_token_generator.make_token(user),
+        }
+
+    def run(self, prepare):
+        warmup = self.options['warmup']
+        latencies = []
+        queries = errors = 0
+        for number in range(warmup + self.options['requests']):
+            method, path, data = prepare(number)
+            if self.options['cold']:
+                response_cache.backend.clear()
+            counter = QueryCounter()
+            with connection.execute_wrapper(counter):
+                started = time.perf_counter()
+                response = getattr(self.client, method)(path, data)
+                elapsed = time.perf_counter() - started
+            if number < warmup:
+                continue
+            latencies.append(elapsed)
+            queries += counter.count
+            errors += response.status_code >= 400
+        latencies.sort()
+        total = sum(latencies)
+        return {
+            'requests': len(latencies),
+            'errors': errors,
+            'p50_ms': round(percentile(latencies, 50) * 1000, 3),
+            'p99_ms': round(percentile(latencies, 99) * 1000, 3),
+            'mean_ms': round(total / len(latencies) * 1000, 3),
+            'rps': round(len(latencies) / total, 1),
+            'queries_per_request': round(queries / len(latencies), 2),
+        }
@@ -0,0 +1,82 @@
+import time
+
+from django.core.management import BaseCommand, CommandError
+from django.core.signals import request_finished, request_started
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+# Режим -> (CONN_MAX_AGE, CONN_HEALTH_CHECKS).
+MODES = {
+    'new': (0, False),
+    'persistent': (None, False),
+    'persistent+health': (None, True),
+}
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает цикл запроса с новым соединением к БД, '
+            'с постоянным соединением и с его проверкой.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--requests', type=int, default=500,
+            help='Число циклов запроса на режим.',
+        )
+        parser.add_argument('--database', default='default')
+
+    def handle(self, *args, **options):
+        if options['requests'] < 1:
+            raise CommandError('Нужен хотя бы один запрос')
+        connection = connections[options['database']]
+        saved = {key: connection.settings_dict.get(key)
+                 for key in ('CONN_MAX_AGE', 'CONN_HEALTH_CHECKS')}
+        self.stdout.write(
+            f'{connection.vendor}, настроено: CONN_MAX_AGE='
+            f'{saved["CONN_MAX_AGE"]}, CONN_HEALTH_CHECKS='
+            f'{saved["CONN_HEALTH_CHECKS"]}'
+        )
+        if not saved['CONN_MAX_AGE']:
+            # Так настроен образ под ASGI: соединение на каждый запрос
+            # открывается к pgbouncer из DB_HOST.
+            self.stdout.write(
+                'Постоянные соединения в настройках выключены: к этому '
+                'развертыванию относится только режим new.'
+            )
+        try:
+            for mode, (max_age, health_checks) in MODES.items():
+                connection.close()
+                connection.settings_dict['CONN_MAX_AGE'] = max_age
+                connection.settings_dict['CONN_HEALTH_CHECKS'] = health_checks
+                self.measure(mode, connection, options['requests'])
+        finally:
+            connection.close()
+            connection.settings_dict.update(saved)
+
+    def measure(self, mode, connection, requests):
+        opened = []
+
+        def count(sender, connection, **kwargs):
+            opened.append(connection.alias)
+
+        connection_created.connect(count)
+        latencies = []
+        try:
+            for _ in range(requests):
+                # Тот же цикл, что у запроса к Django: сигналы открывают
+                # и закрывают соединения по CONN_MAX_AGE.
+                started = time.perf_counter()
+                request_started.send(sender=self.__class__)
+                with connection.cursor() as cursor:
+                    cursor.execute('SELECT 1')
+                request_finished.send(sender=self.__class__)
+                latencies.append(time.perf_counter() - started)
+        finally:
+            connection_created.disconnect(count)
+        latencies.sort()
+        self.stdout.write(
+            f'{mode}: {requests} запросов, соединений открыто '
+            f'{opened.count(connection.alias)}, p50 '
+            f'{latencies[len(latencies) // 2] * 1000:.3f} мс, p99 '
+            f'{latencies[int(len(latencies) * 0.99)] * 1000:.3f} мс, '
+            f'в среднем {sum(latencies) / requests * 1000:.3f} мс'
+        )
@@ -0,0 +1,82 @@
+import time
+
+from api.renderers import ORJSONRenderer
+from api.serializers import (CommentsSerializer, GetTitleSerializer,
+                             ReviewsSerializer)
+from api.values import (CommentValuesSerializer, ReviewValuesSerializer,
+                        TitleValuesSerializer)
+from api.views import TitleViewSet
+from django.core.management import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+from reviews.models import Comment, Review
+from reviews.seed import seed_catalog, seed_reviews
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает скорость ModelSerializer + JSONRenderer и '
+            'сериализаторов из .values() + ORJSONRenderer.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows', type=int, default=1000,
+            help='Сколько строк сериализовать за один прогон.',
+        )
+        parser.add_argument(
+            '--repeat', type=int, default=5,
+            help='Число прогонов; берется лучший результат.',
+        )
+
+    def handle(self, *args, **options):
+        rows = options['rows']
+        with transaction.atomic():
+            title_ids = seed_catalog(titles=rows)
+            seed_reviews(title_ids, reviews_per_title=1,
+                         comments_per_review=1)
+            reviews = Review.objects.select_related('author')
+            comments = Comment.objects.select_related('author')
+            cases = (
+                ('titles', TitleViewSet.queryset,
+                 GetTitleSerializer, TitleValuesSerializer),
+                ('reviews', reviews, ReviewsSerializer,
+                 ReviewValuesSerializer),
+                ('comments', comments, CommentsSerializer,
+                 CommentValuesSerializer),
+            )
+            for name, queryset, serializer, values_serializer in cases:
+                self.compare(name, queryset.order_by('pk')[:rows], serializer,
+                             values_serializer, options['repeat'])
+            transaction.set_rollback(True)
+
+    def compare(self, name, queryset, serializer, values_serializer,
+                repeat):
+        def model_path():
+            return JSONRenderer().render(
+                serializer(queryset.all(), many=True).data
+            )
+
+        def values_path():
+            return ORJSONRenderer().render(values_serializer(
+                values_serializer.values(queryset.all())
+            ).data)
+
+        expected, model_time = self.measure(model_path, repeat)
+        actual, values_time = self.measure(values_path, repeat)
+        if actual != expected:
+            raise CommandError(f'{name}: вывод сериализаторов различается')
+        count = queryset.count()
+        self.stdout.write(
+            f'{name}: {count} строк, ModelSerializer '
+            f'{count / model_time:.0f} строк/с, .values() '
+            f'{count / values_time:.0f} строк/с, '
+            f'ускорение {model_time / values_time:.1f}x'
+        )
+
+    def measure(self, render, repeat):
+        best = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            output = render()
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return output, best
@@ -0,0 +1,74 @@
+from itertools import combinations
+
+from api.filters import TitleFilter
+from api.views import TitleViewSet
+from django.core.management import BaseCommand, CommandError
+from django.db import connection, transaction
+from reviews.models import GenreTitle, Title
+from reviews.seed import seed_catalog
+
+
+class Command(BaseCommand):
+    help = ('Выполняет EXPLAIN ANALYZE для сочетаний фильтров TitleFilter '
+            'и отмечает последовательные сканирования.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--seed', type=int, default=0,
+            help='Сколько синтетических произведений создать перед '
+                 'проверкой; после проверки они удаляются.',
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            if options['seed']:
+                seed_catalog(titles=options['seed'])
+                if connection.vendor == 'postgresql':
+                    with connection.cursor() as cursor:
+                        cursor.execute('ANALYZE')
+            flagged = [params for params in self.get_params()
+                       if self.explain(params)]
+            transaction.set_rollback(True)
+        if flagged:
+            raise CommandError(
+                f'Последовательное сканирование в {len(flagged)} запросах'
+            )
+        self.stdout.write(self.style.SUCCESS('Все запросы используют индексы'))
+
+    def get_params(self):
+        title = Title.objects.filter(category__isnull=False).values(
+            'category__slug', 'year', 'name'
+        ).first()
+        link = GenreTitle.objects.values('genre__slug').first()
+        if title is None or link is None:
+            raise CommandError('Нет данных: запустите команду с --seed')
+        values = {
+            'category': title['category__slug'],
+            'genre': link['genre__slug'],
+            'year': title['year'],
+            'name': title['name'].split()[0],
+        }
+        for size in range(1, len(values) + 1):
+            for keys in combinations(values, size):
+                yield {key: values[key] for key in keys}
+
+    def explain(self, params):
+        queryset = TitleFilter(params, queryset=TitleViewSet.queryset).qs
+        queryset = queryset[:TitleViewSet.pagination_class.page_size]
+        if connection.vendor == 'postgresql':
+            plan = queryset.explain(analyze=True)
+        else:
+            plan = queryset.explain()
+        seq_scans = [line for line in plan.splitlines()
+                     if self.is_seq_scan(line)]
+        self.stdout.write(f'{params}\n{plan}\n')
+        for line in seq_scans:
+            self.stdout.write(self.style.WARNING(
+                f'Последовательное сканирование: {line.strip()}'
+            ))
+        return seq_scans
+
+    def is_seq_scan(self, line):
+        if connection.vendor == 'postgresql':
+            return 'Seq Scan' in line
+        return 'SCAN ' in line and ' USING ' not in line
@@ -0,0 +1,237 @@
+import asyncio
+import cProfile
+import os
+import random
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+
+TIME_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+# Имя метрики -> (описание, границы корзин).
+METRICS = {
+    'yamdb_request_duration_seconds': (
+        'Время обработки запроса', TIME_BUCKETS),
+    'yamdb_db_duration_seconds': (
+        'Время SQL-запросов за запрос', TIME_BUCKETS),
+    'yamdb_db_queries': (
+        'Число SQL-запросов за запрос', QUERY_BUCKETS),
+    'yamdb_serializer_duration_seconds': (
+        'Время сериализации ответа', TIME_BUCKETS),
+}
+
+_record = ContextVar('metrics_record', default=None)
+
+
+class Histogram:
+    """Гистограмма Prometheus: счетчики корзин, сумма и число значений."""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+    def lines(self, name, labels):
+        total = 0
+        for bound, count in zip((*self.buckets, '+Inf'), self.counts):
+            total += count
+            yield f'{name}_bucket{{{labels},le="{bound}"}} {total}'
+        yield f'{name}_sum{{{labels}}} {self.sum}'
+        yield f'{name}_count{{{labels}}} {total}'
+
+
+class Registry:
+    """Гистограммы метрик по view и методу в памяти процесса.
+
+    У каждого процесса-воркера свои счетчики: Prometheus опрашивает
+    процессы по отдельности или суммирует их ответы.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.histograms = {}
+
+    def observe(self, labels, values):
+        with self.lock:
+            for name, value in values.items():
+                histogram = self.histograms.get((name, labels))
+                if histogram is None:
+                    histogram = self.histograms[name, labels] = Histogram(
+                        METRICS[name][1]
+                    )
+                histogram.observe(value)
+
+    def render(self):
+        with self.lock:
+            lines = []
+            for name, (help_text, _) in METRICS.items():
+                lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'# TYPE {name} histogram')
+                for (metric, labels), histogram in sorted(
+                    self.histograms.items()
+                ):
+                    if metric == name:
+                        lines.extend(histogram.lines(
+                            name, 'view="{}",method="{}"'.format(*labels)
+                        ))
+        return '\n'.join(lines) + '\n'
+
+    def clear(self):
+        with self.lock:
+            self.histograms.clear()
+
+
+registry = Registry()
+
+
+class RequestRecord:
+    """Счетчики одного запроса."""
+
+    def __init__(self):
+        self.queries = 0
+        self.db = 0
+        self.serializer = 0
+        self.timing_serializer = False
+
+
+def record_query(execute, sql, params, many, context):
+    """Обертка SQL-запросов, которая ставится на каждое соединение.
+
+    Запись запроса берется из контекста: asgiref копирует его в поток,
+    где под ASGI выполняется синхронный код.
+    """
+    record = _record.get()
+    if record is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        record.db += time.perf_counter() - start
+        record.queries += 1
+
+
+def install_query_recorder(connection):
+    # В начало списка: execute_wrapper() снимает последнюю обертку.
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, record_query)
+
+
+@contextmanager
+def timed_serializer():
+    """Добавляем время блока к сериализации текущего запроса.
+
+    Вложенные сериализаторы не считаются второй раз.
+    """
+    record = _record.get()
+    if record is None or record.timing_serializer:
+        yield
+        return
+    record.timing_serializer = True
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record.serializer += time.perf_counter() - start
+        record.timing_serializer = False
+
+
+class TimedSerializerMixin:
+    """Время to_representation идет в метрику сериализации."""
+
+    def to_representation(self, instance):
+        with timed_serializer():
+            return super().to_representation(instance)
+
+
+def get_view_label(request):
+    # Имя маршрута, а не путь: число значений метки ограничено.
+    match = getattr(request, 'resolver_match', None)
+    return match.view_name if match else 'unmatched'
+
+
+class MetricsMiddleware:
+    """Число и время SQL-запросов, время сериализации и ответа по view.
+
+    Работает и в синхронном, и в асинхронном стеке middleware.
+    В синхронном режиме с вероятностью PROFILE_SAMPLE_RATE запрос
+    выполняется под cProfile; если он медленнее PROFILE_SLOW_SECONDS,
+    статистика сохраняется в PROFILE_DIR для pstats или snakeviz.
+    В цикле событий профиль смешал бы разные запросы, там его нет.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            # Как в MiddlewareMixin: Django увидит асинхронный middleware.
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self):
+            return self.__acall__(request)
+        config = settings.METRICS
+        if not config['ENABLED']:
+            return self.get_response(request)
+        for connection in connections.all():
+            install_query_recorder(connection)
+        record = RequestRecord()
+        token = _record.set(record)
+        profiler = None
+        if random.random() < config['PROFILE_SAMPLE_RATE']:
+            profiler = cProfile.Profile()
+            profiler.enable()
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            if profiler is not None:
+                profiler.disable()
+            _record.reset(token)
+        duration = time.perf_counter() - start
+        self.observe(request, record, duration)
+        if profiler is not None and duration >= config['PROFILE_SLOW_SECONDS']:
+            self.dump_profile(profiler, get_view_label(request),
+                              request.method)
+        return response
+
+    async def __acall__(self, request):
+        if not settings.METRICS['ENABLED']:
+            return await self.get_response(request)
+        record = RequestRecord()
+        token = _record.set(record)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _record.reset(token)
+        self.observe(request, record, time.perf_counter() - start)
+        return response
+
+    def observe(self, request, record, duration):
+        registry.observe((get_view_label(request), request.method), {
+            'yamdb_request_duration_seconds': duration,
+            'yamdb_db_duration_seconds': record.db,
+            'yamdb_db_queries': record.queries,
+            'yamdb_serializer_duration_seconds': record.serializer,
+        })
+
+    def dump_profile(self, profiler, view, method):
+        directory = settings.METRICS['PROFILE_DIR']
+        os.makedirs(directory, exist_ok=True)
+        profiler.dump_stats(os.path.join(
+            directory,
+            f'{int(time.time() * 1000)}-{os.getpid()}-{method}-'
+            f'{view.replace(":", "_")}.prof'
+        ))
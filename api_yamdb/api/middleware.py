@@ -0,0 +1,111 @@
+import asyncio
+import logging
+import random
+
+from api.authentication import auth_cache
+from api.cache import CacheError
+from api.replicas import get_replicas, reset_replica, use_replica
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+logger = logging.getLogger(__name__)
+
+
+def sticky_key(request):
+    """Ключ пользователя для чтения своих записей или None.
+
+    Берем id из JWT без обращения к БД: новый токен того же
+    пользователя остается закрепленным за default. Анонимные клиенты
+    пишут только при регистрации и получении токена, а это POST-запросы,
+    которые и так идут в default.
+    """
+    header = request.META.get('HTTP_AUTHORIZATION')
+    if not header:
+        return None
+    authentication = JWTAuthentication()
+    raw_token = authentication.get_raw_token(header.encode())
+    if raw_token is None:
+        return None
+    try:
+        token = authentication.get_validated_token(raw_token)
+    except InvalidToken:
+        return None
+    return f'replica:sticky:{token.get(api_settings.USER_ID_CLAIM)}'
+
+
+class ReplicaMiddleware:
+    """Выбираем базу для чтения на время запроса.
+
+    Безопасные запросы читают из случайной реплики. Запись, а также
+    запросы пользователя в течение DB_REPLICA_STICKY_SECONDS после его
+    успешной записи читают из default: он видит свои изменения, даже
+    если реплика отстает. Отметка о записи хранится в AUTH_CACHE и
+    действует во всех процессах, только если хранилище общее (api.E001).
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self):
+            return self.__acall__(request)
+        replicas = get_replicas()
+        if not replicas:
+            return self.get_response(request)
+        key = sticky_key(request)
+        token = use_replica(self.choose_replica(request, key, replicas))
+        try:
+            response = self.get_response(request)
+        finally:
+            reset_replica(token)
+        self.remember_write(request, response, key)
+        return response
+
+    async def __acall__(self, request):
+        replicas = get_replicas()
+        if not replicas:
+            return await self.get_response(request)
+        key = sticky_key(request)
+        token = use_replica(await self.call_cache(
+            self.choose_replica, request, key, replicas
+        ))
+        try:
+            response = await self.get_response(request)
+        finally:
+            reset_replica(token)
+        await self.call_cache(self.remember_write, request, response, key)
+        return response
+
+    async def call_cache(self, func, *args):
+        # Обращения к Redis не должны останавливать цикл событий.
+        if auth_cache.blocking:
+            return await sync_to_async(func, thread_sensitive=False)(*args)
+        return func(*args)
+
+    def choose_replica(self, request, key, replicas):
+        if request.method not in SAFE_METHODS:
+            return None
+        try:
+            if key is not None and auth_cache.get(key) is not None:
+                return None
+        except CacheError as error:
+            # Не знаем, писал ли пользователь: читаем из default.
+            logger.warning('Отметки о записи недоступны: %s', error)
+            return None
+        return random.choice(replicas)
+
+    def remember_write(self, request, response, key):
+        if (key is not None and request.method not in SAFE_METHODS
+                and response.status_code < 400):
+            try:
+                auth_cache.set(key, 1, settings.DB_REPLICA_STICKY_SECONDS)
+            except CacheError as error:
+                logger.warning('Отметка о записи не сохранена: %s', error)
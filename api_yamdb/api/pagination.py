@@ -0,0 +1,62 @@
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+
+class PageNumberOrCursorPagination(PageNumberPagination):
+    """Постраничная пагинация с включаемым режимом курсора.
+
+    По умолчанию отдаем страницы по номеру, как раньше. С параметром
+    `?pagination=cursor` переключаемся на курсор по `ordering`: такой
+    режим не выполняет COUNT(*) и не использует OFFSET.
+
+    Размер страницы задается параметром `?page_size=` в обоих режимах
+    и ограничен `max_page_size`.
+    """
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    mode_query_param = 'pagination'
+    cursor_mode = 'cursor'
+    ordering = ('id',)
+    cursor = None
+
+    def get_cursor_paginator(self):
+        paginator = CursorPagination()
+        paginator.ordering = self.ordering
+        paginator.page_size = self.page_size
+        paginator.page_size_query_param = self.page_size_query_param
+        paginator.max_page_size = self.max_page_size
+        return paginator
+
+    def is_cursor_mode(self, request):
+        return (request.query_params.get(self.mode_query_param)
+                == self.cursor_mode)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if not self.is_cursor_mode(request):
+            return super().paginate_queryset(queryset, request, view)
+        self.cursor = self.get_cursor_paginator()
+        self.display_page_controls = True
+        return self.cursor.paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.cursor is None:
+            return super().get_paginated_response(data)
+        return self.cursor.get_paginated_response(data)
+
+    def get_results(self, data):
+        if self.cursor is None:
+            return super().get_results(data)
+        return self.cursor.get_results(data)
+
+    def to_html(self):
+        if self.cursor is None:
+            return super().to_html()
+        return self.cursor.to_html()
+
+
+class TitlePagination(PageNumberOrCursorPagination):
+    ordering = ('id',)
+
+
+class PubDatePagination(PageNumberOrCursorPagination):
+    ordering = ('pub_date', 'id')
+    max_page_size = 500
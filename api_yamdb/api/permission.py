@@ -1,10 +1,12 @@
+from api.authentication import load_db_user
 from rest_framework import permissions
 
 
 class IsAdmin(permissions.BasePermission):
     def has_permission(self, request, view):
-        return (request.user.is_admin
-                or request.user.is_staff)
+        user = load_db_user(request)
+        return (user.is_admin
+                or user.is_staff)
 
     def has_object_permission(self, request, view, obj):
         return (request.user.is_admin
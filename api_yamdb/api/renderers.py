@@ -0,0 +1,34 @@
+import orjson
+from api.metrics import timed_serializer
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+
+class ORJSONRenderer(JSONRenderer):
+    """JSONRenderer на orjson с тем же выводом байт в байт.
+
+    Типы, которые orjson не знает или выводит иначе (даты, Decimal,
+    ленивые строки), передаются в кодировщик DRF. Отступы нужны только
+    браузерному API, для них используем обычный JSONRenderer.
+    """
+    options = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        with timed_serializer():
+            return self.render_bytes(data, accepted_media_type,
+                                     renderer_context)
+
+    def render_bytes(self, data, accepted_media_type, renderer_context):
+        if data is None:
+            return b''
+        if (self.ensure_ascii or not self.compact
+                or self.get_indent(accepted_media_type or '',
+                                   renderer_context or {})):
+            return super().render(data, accepted_media_type,
+                                  renderer_context)
+        ret = orjson.dumps(data, default=JSONEncoder().default,
+                           option=self.options)
+        # Как в JSONRenderer: U+2028 и U+2029 экранируем для JavaScript.
+        return ret.replace('\u2028'.encode(), b'\\u2028').replace(
+            '\u2029'.encode(), b'\\u2029'
+        )
@@ -0,0 +1,50 @@
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+# Реплика, из которой читает текущий запрос; None - читаем из default.
+_read_alias = ContextVar('replica_read_alias', default=None)
+
+
+def get_replicas():
+    return [alias for alias in settings.DATABASES
+            if alias.startswith('replica_')]
+
+
+def use_replica(alias):
+    """Читать из реплики alias до reset() возвращенного токена."""
+    return _read_alias.set(alias)
+
+
+def reset_replica(token):
+    _read_alias.reset(token)
+
+
+def replica_may_lag(modified):
+    """Читаем из реплики, а данные менялись недавно: реплика может
+    еще не получить изменение, и ответ не стоит кэшировать."""
+    return (_read_alias.get() is not None and modified is not None
+            and time.time() - modified < settings.DB_REPLICA_STICKY_SECONDS)
+
+
+class ReplicaRouter:
+    """Чтение из реплики, выбранной ReplicaMiddleware, запись в default.
+
+    Вне запросов (команды, shell, тесты) и внутри транзакции default
+    все запросы идут в default. Реплики содержат те же данные, поэтому
+    связи между объектами из разных баз разрешены.
+    """
+
+    def db_for_read(self, model, **hints):
+        alias = _read_alias.get()
+        if alias is None or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return alias
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
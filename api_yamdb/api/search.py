@@ -0,0 +1,46 @@
+from api.pagination import PageNumberOrCursorPagination
+from django.db import connections
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import SearchFilter
+
+
+def is_postgresql(queryset):
+    return connections[queryset.db].vendor == 'postgresql'
+
+
+def reject_cursor_mode(request):
+    """Курсор сортирует по своим полям и отменил бы ранжирование поиска,
+    поэтому поиск по названию доступен только постранично."""
+    if PageNumberOrCursorPagination().is_cursor_mode(request):
+        raise ValidationError({
+            'pagination': 'Поиск по названию не сочетается с режимом '
+                          'курсора: выдача ранжируется по близости.'
+        })
+
+
+def rank_by_similarity(queryset, field, value):
+    """Сортируем по триграммной близости к запросу, если БД - PostgreSQL.
+
+    Сам фильтр по подстроке в PostgreSQL обслуживает GIN-индекс
+    gin_trgm_ops, в остальных БД порядок выдачи не меняется.
+    """
+    if not is_postgresql(queryset):
+        return queryset
+    from django.contrib.postgres.search import TrigramSimilarity
+    return queryset.annotate(
+        search_rank=TrigramSimilarity(field, value)
+    ).order_by('-search_rank', 'pk')
+
+
+class RankedSearchFilter(SearchFilter):
+    """SearchFilter, который выдает самые похожие названия первыми."""
+
+    def filter_queryset(self, request, queryset, view):
+        queryset = super().filter_queryset(request, queryset, view)
+        search = ' '.join(self.get_search_terms(request))
+        search_fields = self.get_search_fields(view, request)
+        if not search or not search_fields:
+            return queryset
+        reject_cursor_mode(request)
+        field = search_fields[0].lstrip(''.join(self.lookup_prefixes))
+        return rank_by_similarity(queryset, field, search)
@@ -1,27 +1,55 @@
 import re
 from datetime import datetime as dt
 
+from api.metrics import TimedSerializerMixin
 from django.core.exceptions import ValidationError
+from django.db.models import Q
 from django.shortcuts import get_object_or_404
 from rest_framework import serializers
 from reviews.models import Category, Comment, Genre, Review, Title, User
 
 
-class CategorySerializer(serializers.ModelSerializer):
+class SparseFieldsMixin:
+    """Оставляем поля из context['fields'], связи из context['expand']
+    заменяем сериализаторами из expandable_fields."""
+    expandable_fields = {}
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        fields = self.context.get('fields')
+        if fields:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+        for name in self.context.get('expand', ()):
+            if name in self.fields and name in self.expandable_fields:
+                self.fields[name] = self.expandable_fields[name](
+                    read_only=True
+                )
+
+
+class AuthorSerializer(serializers.ModelSerializer):
+
+    class Meta:
+        fields = ('username', 'first_name', 'last_name')
+        model = User
+
+
+class CategorySerializer(TimedSerializerMixin, serializers.ModelSerializer):
 
     class Meta:
         exclude = ('id', )
         model = Category
 
 
-class GenreSerializer(serializers.ModelSerializer):
+class GenreSerializer(TimedSerializerMixin, serializers.ModelSerializer):
 
     class Meta:
         exclude = ('id', )
         model = Genre
 
 
-class GetTitleSerializer(serializers.ModelSerializer):
+class GetTitleSerializer(TimedSerializerMixin, SparseFieldsMixin,
+                         serializers.ModelSerializer):
     category = CategorySerializer(read_only=True)
     genre = GenreSerializer(read_only=True, many=True)
     rating = serializers.IntegerField(read_only=True)
@@ -32,7 +60,8 @@ class GetTitleSerializer(serializers.ModelSerializer):
         model = Title
 
 
-class CreateEditDeleteTitleSerializer(serializers.ModelSerializer):
+class CreateEditDeleteTitleSerializer(TimedSerializerMixin,
+                                      serializers.ModelSerializer):
     rating = serializers.IntegerField(read_only=True)
     category = serializers.SlugRelatedField(
         slug_field='slug',
@@ -56,10 +85,12 @@ class CreateEditDeleteTitleSerializer(serializers.ModelSerializer):
         return value
 
 
-class ReviewsSerializer(serializers.ModelSerializer):
+class ReviewsSerializer(TimedSerializerMixin, SparseFieldsMixin,
+                        serializers.ModelSerializer):
     author = serializers.SlugRelatedField(
         read_only=True, slug_field='username'
     )
+    expandable_fields = {'author': AuthorSerializer}
 
     def validate(self, data, *args, **kwargs):
         request = self.context['request']
@@ -79,10 +110,12 @@ class ReviewsSerializer(serializers.ModelSerializer):
         model = Review
 
 
-class CommentsSerializer(serializers.ModelSerializer):
+class CommentsSerializer(TimedSerializerMixin, SparseFieldsMixin,
+                         serializers.ModelSerializer):
     author = serializers.SlugRelatedField(
         read_only=True, slug_field='username'
     )
+    expandable_fields = {'author': AuthorSerializer}
 
     class Meta:
         fields = ('id', 'text', 'author', 'pub_date',)
@@ -114,18 +147,22 @@ class SendCodeSerializer(serializers.Serializer):
             )
         if errors:
             raise serializers.ValidationError(errors)
-        if User.objects.filter(email=data["email"]):
-            user = User.objects.get(email=data["email"])
-            if user.username != data["username"]:
-                raise serializers.ValidationError(
-                    {"user": "Данный username уже зарегистрирован"}
-                )
-        elif User.objects.filter(username=data["username"]):
-            user = User.objects.get(username=data["username"])
-            if user.email != data["email"]:
-                raise serializers.ValidationError(
-                    {"email": "Данный email уже зарегистрирован"}
-                )
+        # Один запрос находит и владельца email, и владельца username.
+        users = list(User.objects.filter(
+            Q(email=data["email"]) | Q(username=data["username"])
+        )[:2])
+        for user in users:
+            if user.email == data["email"]:
+                if user.username != data["username"]:
+                    raise serializers.ValidationError(
+                        {"user": "Данный username уже зарегистрирован"}
+                    )
+                data["user"] = user
+                return data
+        if users:
+            raise serializers.ValidationError(
+                {"email": "Данный email уже зарегистрирован"}
+            )
         return data
 
 
@@ -137,7 +174,7 @@ class CheckConfirmationCodeSerializer(serializers.Serializer):
         required=True)
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(TimedSerializerMixin, serializers.ModelSerializer):
 
     class Meta:
         model = User
@@ -146,7 +183,8 @@ class UserSerializer(serializers.ModelSerializer):
             'last_name', 'bio', 'role')
 
 
-class IsNotAdminUserSerializer(serializers.ModelSerializer):
+class IsNotAdminUserSerializer(TimedSerializerMixin,
+                               serializers.ModelSerializer):
 
     class Meta:
         model = User
@@ -0,0 +1,97 @@
+from api.authentication import AUTH_FIELDS, mark_auth_changed
+from api.cache import invalidate_object, response_cache
+from api.metrics import install_query_recorder
+from django.core.signals import request_started
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_save)
+from django.dispatch import receiver
+from reviews.models import Category, Comment, Genre, Review, Title, User
+from reviews.signals import bulk_changed
+
+
+@receiver(connection_created)
+def record_queries(sender, connection, **kwargs):
+    # Под ASGI синхронный код идет в новых потоках со своими соединениями.
+    install_query_recorder(connection)
+
+
+@receiver(request_started)
+def check_db_connections(sender, **kwargs):
+    """Закрываем постоянные соединения, которые перестали отвечать.
+
+    То же, что CONN_HEALTH_CHECKS в Django 4.1: без проверки первый
+    запрос после разрыва соединения упал бы с ошибкой. Закрытое
+    соединение Django откроет заново при первом обращении к БД.
+    """
+    for connection in connections.all():
+        if (connection.connection is not None
+                and connection.settings_dict.get('CONN_HEALTH_CHECKS')
+                and not connection.in_atomic_block
+                and not connection.is_usable()):
+            connection.close()
+
+
+@receiver((post_save, post_delete), sender=Title)
+def invalidate_title(sender, instance, **kwargs):
+    invalidate_object('titles', instance.pk)
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def invalidate_title_genre(sender, instance, reverse, **kwargs):
+    if reverse:
+        response_cache.invalidate('titles')
+    else:
+        invalidate_object('titles', instance.pk)
+
+
+@receiver((post_save, post_delete), sender=Review)
+def invalidate_title_rating(sender, instance, **kwargs):
+    invalidate_object('titles', instance.title_id)
+
+
+@receiver((post_save, post_delete), sender=Comment)
+def invalidate_review_comments(sender, instance, **kwargs):
+    response_cache.invalidate(f'comments:{instance.reviews_id}')
+
+
+@receiver((post_save, post_delete), sender=Category)
+def invalidate_category(sender, instance, **kwargs):
+    invalidate_object('categories')
+    response_cache.invalidate('titles')
+
+
+@receiver((post_save, post_delete), sender=Genre)
+def invalidate_genre(sender, instance, **kwargs):
+    invalidate_object('genres')
+    response_cache.invalidate('titles')
+
+
+@receiver(bulk_changed)
+def invalidate_all(sender, **kwargs):
+    # Какие строки изменились, неизвестно: сбрасываем все пространства.
+    response_cache.invalidate(
+        'categories', 'genres', 'titles', 'reviews', 'comments'
+    )
+
+
+@receiver(pre_save, sender=User)
+def track_auth_change(sender, instance, update_fields, **kwargs):
+    if instance.pk is None:
+        return
+    if update_fields is not None and not set(AUTH_FIELDS) & update_fields:
+        return
+    saved = User.objects.filter(pk=instance.pk).values(*AUTH_FIELDS).first()
+    if saved is None:
+        return
+    if any(saved[field] != getattr(instance, field) for field in AUTH_FIELDS):
+        mark_auth_changed(instance.pk)
+    if saved['username'] != instance.username:
+        # Имя автора входит в закэшированные отзывы и комментарии.
+        response_cache.invalidate('reviews', 'comments')
+
+
+@receiver(post_delete, sender=User)
+def track_auth_delete(sender, instance, **kwargs):
+    mark_auth_changed(instance.pk)
@@ -0,0 +1,122 @@
+import hashlib
+import logging
+import math
+import time
+from collections.abc import Mapping
+
+from api.authentication import auth_cache
+from api.cache import CacheError
+from django.conf import settings
+from django.utils.module_loading import import_string
+from rest_framework.throttling import BaseThrottle
+
+logger = logging.getLogger(__name__)
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_rate(rate):
+    """'5/m' или '5/minute' -> (5, 60)."""
+    limit, period = rate.split('/')
+    return int(limit), PERIODS[period[0]]
+
+
+class SlidingWindow:
+    """Скользящее окно, оцененное по двум фиксированным окнам.
+
+    Счетчик прошлого окна учитывается с весом оставшейся в нем доли
+    времени. Одна операция incr и одно чтение на запрос.
+    """
+
+    def __init__(self, backend, limit, period):
+        self.backend = backend
+        self.limit = limit
+        self.period = period
+
+    def hit(self, key):
+        now = time.time()
+        window, elapsed = divmod(now, self.period)
+        current = self.backend.incr(f'{key}:{int(window)}',
+                                    timeout=self.period * 2)
+        previous, = self.backend.get_counters([f'{key}:{int(window) - 1}'])
+        weight = 1 - elapsed / self.period
+        if previous * weight + current <= self.limit:
+            return None
+        return self.period - elapsed
+
+
+class TokenBucket:
+    """Ведро токенов в виде GCRA: храним одно время, когда ведро полно.
+
+    Запросы, пришедшие одновременно в разные процессы, могут прочитать
+    одно значение и пройти оба: точность ограничена одним запросом
+    на процесс, зато на запрос нужны одно чтение и одна запись.
+    """
+
+    def __init__(self, backend, limit, period):
+        self.backend = backend
+        self.interval = period / limit
+        self.capacity = period
+
+    def hit(self, key):
+        now = time.time()
+        full_at = max(self.backend.get(key) or now, now) + self.interval
+        if full_at - now > self.capacity:
+            return full_at - now - self.capacity
+        self.backend.set(key, full_at, math.ceil(full_at - now))
+        return None
+
+
+class AuthRateThrottle(BaseThrottle):
+    """Ограничение частоты по IP, username и email из AUTH_THROTTLES.
+
+    Для области `scope` задаются алгоритм `ALGORITHM` и частоты `RATES`
+    для каждого признака: 'ip' или поле запроса. Счетчики хранятся
+    в AUTH_CACHE; к БД ограничение не обращается. Общим для процессов
+    оно становится только с общим хранилищем, например RedisBackend.
+    IP берется с учетом NUM_PROXIES из настроек DRF.
+    """
+    scope = None
+
+    def allow_request(self, request, view):
+        config = settings.AUTH_THROTTLES.get(self.scope)
+        if not config:
+            return True
+        algorithm = import_string(config['ALGORITHM'])
+        self.wait_time = None
+        for name, rate in config['RATES'].items():
+            ident = self.get_key_ident(request, name)
+            if not ident:
+                continue
+            limiter = algorithm(auth_cache, *parse_rate(rate))
+            digest = hashlib.sha1(ident.encode()).hexdigest()
+            try:
+                self.wait_time = limiter.hit(
+                    f'throttle:{self.scope}:{name}:{digest}'
+                )
+            except CacheError as error:
+                # Без хранилища не ограничиваем, но и не отвечаем 500.
+                logger.warning('Ограничение частоты не работает: %s', error)
+            if self.wait_time is not None:
+                return False
+        return True
+
+    def get_key_ident(self, request, name):
+        if name == 'ip':
+            return self.get_ident(request)
+        if not isinstance(request.data, Mapping):
+            # Тело - JSON-массив или скаляр: ошибку вернет сериализатор.
+            return None
+        value = request.data.get(name)
+        return value.strip().lower() if isinstance(value, str) else None
+
+    def wait(self):
+        return self.wait_time
+
+
+class SendCodeThrottle(AuthRateThrottle):
+    scope = 'send_code'
+
+
+class GetJwtThrottle(AuthRateThrottle):
+    scope = 'get_jwt'
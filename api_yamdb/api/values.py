@@ -0,0 +1,300 @@
+from operator import itemgetter
+
+from api.metrics import timed_serializer
+from django.db import connection
+from django.db.models import Count, F, Window
+from django.db.models.functions import RowNumber
+from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.response import Response
+from reviews.models import SCORES, Comment, GenreTitle
+
+# Поле без привязки к сериализатору: нужен только его to_representation,
+# чтобы даты выводились так же, как в ModelSerializer.
+DATETIME = serializers.DateTimeField()
+
+
+def split_param(value):
+    return [name for name in value.split(',') if name]
+
+
+class ValuesSerializer:
+    """Сериализатор списков на чтение из словарей .values().
+
+    Не создает объекты моделей и поля сериализатора на каждую строку,
+    а выдает те же данные, что и соответствующий ModelSerializer.
+    `columns` задает колонки .values() для каждого поля ответа,
+    `expand_columns` - для раскрытых связей. Поле без метода get_<поле>
+    берется из своей единственной колонки.
+    """
+    columns = {}
+    expand_columns = {}
+
+    def __init__(self, rows, fields=None, expand=()):
+        self.rows = rows
+        self.fields = [field for field in self.columns
+                       if fields is None or field in fields]
+        self.expand = expand
+        self.getters = [
+            (field, getattr(self, f'get_{field}', None)
+             or itemgetter(self.columns[field][0]))
+            for field in self.fields
+        ]
+
+    @classmethod
+    def get_columns(cls, fields=None, expand=(), extra=()):
+        columns = dict.fromkeys(extra)
+        for field in fields or cls.columns:
+            if field in expand:
+                columns.update(dict.fromkeys(cls.expand_columns[field]))
+            else:
+                columns.update(dict.fromkeys(cls.columns[field]))
+        return list(columns)
+
+    @classmethod
+    def values(cls, queryset, fields=None, expand=(), extra=()):
+        return queryset.prefetch_related(None).values(
+            *cls.get_columns(fields, expand, extra)
+        )
+
+    @property
+    def data(self):
+        with timed_serializer():
+            return [self.to_representation(row) for row in self.rows]
+
+    def to_representation(self, row):
+        return {field: get(row) for field, get in self.getters}
+
+
+class TitleValuesSerializer(ValuesSerializer):
+    """То же, что GetTitleSerializer."""
+    columns = {
+        'id': ('id',),
+        'name': ('name',),
+        'year': ('year',),
+        'rating': ('rating_sum', 'rating_count'),
+        'description': ('description',),
+        'genre': ('id',),
+        'category': ('category__name', 'category__slug'),
+    }
+
+    @property
+    def data(self):
+        self.genres = {row['id']: [] for row in self.rows}
+        if self.genres and 'genre' in self.fields:
+            links = GenreTitle.objects.filter(
+                title_id__in=list(self.genres)
+            ).order_by('title_id', 'genre_id').values_list(
+                'title_id', 'genre__name', 'genre__slug'
+            )
+            for title_id, name, slug in links:
+                self.genres[title_id].append({'name': name, 'slug': slug})
+        return super().data
+
+    def get_rating(self, row):
+        if not row['rating_count']:
+            return None
+        return int(row['rating_sum'] / row['rating_count'])
+
+    def get_genre(self, row):
+        return self.genres[row['id']]
+
+    def get_category(self, row):
+        if row['category__slug'] is None:
+            return None
+        return {'name': row['category__name'],
+                'slug': row['category__slug']}
+
+
+class AuthoredValuesSerializer(ValuesSerializer):
+    """Общие поля отзывов и комментариев; автора можно раскрыть."""
+    expand_columns = {
+        'author': ('author__username', 'author__first_name',
+                   'author__last_name'),
+    }
+
+    def get_author(self, row):
+        if 'author' not in self.expand:
+            return row['author__username']
+        return {'username': row['author__username'],
+                'first_name': row['author__first_name'],
+                'last_name': row['author__last_name']}
+
+    def get_pub_date(self, row):
+        return DATETIME.to_representation(row['pub_date'])
+
+
+class ReviewValuesSerializer(AuthoredValuesSerializer):
+    """То же, что ReviewsSerializer."""
+    columns = {
+        'id': ('id',),
+        'text': ('text',),
+        'author': ('author__username',),
+        'score': ('score',),
+        'pub_date': ('pub_date',),
+    }
+
+
+class CommentValuesSerializer(AuthoredValuesSerializer):
+    """То же, что CommentsSerializer."""
+    columns = {
+        'id': ('id',),
+        'text': ('text',),
+        'author': ('author__username',),
+        'pub_date': ('pub_date',),
+    }
+
+
+STATS_COLUMNS = tuple(f'stats__score_{score}' for score in SCORES)
+
+
+class TitleStatsValuesSerializer(ValuesSerializer):
+    """Статистика оценок произведения из таблицы TitleStats.
+
+    Строки берутся из Title с LEFT JOIN на гистограмму: произведение без
+    отзывов выдается с нулями, а не пропадает из ответа.
+    """
+    columns = {
+        'id': ('id',),
+        'count': STATS_COLUMNS,
+        'mean': STATS_COLUMNS,
+        'median': STATS_COLUMNS,
+        'histogram': STATS_COLUMNS,
+    }
+
+    def get_histogram(self, row):
+        return {score: row[column] or 0
+                for score, column in zip(SCORES, STATS_COLUMNS)}
+
+    def get_count(self, row):
+        return sum(self.get_histogram(row).values())
+
+    def get_mean(self, row):
+        histogram = self.get_histogram(row)
+        count = sum(histogram.values())
+        if not count:
+            return None
+        total = sum(score * number for score, number in histogram.items())
+        return round(total / count, 2)
+
+    def get_median(self, row):
+        histogram = self.get_histogram(row)
+        count = sum(histogram.values())
+        if not count:
+            return None
+        # Ищем оценки на местах (count - 1) // 2 и count // 2 по
+        # накопленной гистограмме, без списка всех оценок.
+        middle = []
+        seen = 0
+        for score, number in histogram.items():
+            seen += number
+            while len(middle) < 2 and seen > (count - 1 + len(middle)) // 2:
+                middle.append(score)
+        return sum(middle) / 2
+
+
+def first_comments(review_ids, limit):
+    """Первые limit комментариев каждого отзыва одним запросом.
+
+    Номер комментария в отзыве считает оконная функция. Django 3.2 не
+    фильтрует по оконным аннотациям, поэтому ограничение накладывается
+    во внешнем SELECT. Возвращаем число комментариев и строки для
+    CommentValuesSerializer по id отзыва.
+    """
+    if not review_ids:
+        return {}, {}
+    ranked = Comment.objects.filter(reviews_id__in=review_ids).annotate(
+        author_name=F('author__username'),
+        place=Window(RowNumber(), partition_by=[F('reviews_id')],
+                     order_by=[F('pub_date').asc(), F('id').asc()]),
+        total=Window(Count('id'), partition_by=[F('reviews_id')]),
+    ).order_by()
+    sql, params = ranked.query.sql_with_params()
+    quote = connection.ops.quote_name
+    totals = dict.fromkeys(review_ids, 0)
+    rows = {review_id: [] for review_id in review_ids}
+    for comment in Comment.objects.raw(
+        f'SELECT * FROM ({sql}) ranked WHERE ranked.{quote("place")} <= %s '
+        f'ORDER BY ranked.{quote("reviews_id")}, ranked.{quote("place")}',
+        (*params, limit),
+    ):
+        totals[comment.reviews_id] = comment.total
+        rows[comment.reviews_id].append({
+            'id': comment.id, 'text': comment.text,
+            'author__username': comment.author_name,
+            'pub_date': comment.pub_date,
+        })
+    return totals, rows
+
+
+class ValuesListMixin:
+    """Отдаем список через values_serializer_class без ModelSerializer.
+
+    На чтение поддерживаются параметры `?fields=` - какие поля отдать,
+    и `?expand=` - какие связи раскрыть. Из БД читаются только колонки
+    выбранных полей, а связи без нужных полей не подгружаются.
+    """
+    values_serializer_class = None
+
+    def get_sparse_param(self, param, allowed):
+        if self.request.method not in SAFE_METHODS:
+            return ()
+        names = split_param(self.request.query_params.get(param, ''))
+        unknown = [name for name in names if name not in allowed]
+        if unknown:
+            raise serializers.ValidationError(
+                {param: f'Неизвестные поля: {", ".join(unknown)}'}
+            )
+        return tuple(dict.fromkeys(names))
+
+    def get_sparse_fields(self):
+        return self.get_sparse_param(
+            'fields', self.values_serializer_class.columns
+        ) or None
+
+    def get_expand(self):
+        return self.get_sparse_param(
+            'expand', self.values_serializer_class.expand_columns
+        )
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['fields'] = self.get_sparse_fields()
+        context['expand'] = self.get_expand()
+        return context
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        fields = self.get_sparse_fields()
+        if self.action != 'retrieve' or fields is None:
+            return queryset
+        columns = self.values_serializer_class.get_columns(
+            fields, self.get_expand()
+        )
+        related = list(dict.fromkeys(
+            column.split('__')[0] for column in columns if '__' in column
+        ))
+        if 'genre' not in fields:
+            queryset = queryset.prefetch_related(None)
+        queryset = queryset.select_related(None)
+        if related:
+            queryset = queryset.select_related(*related)
+        return queryset.only(*columns, *related)
+
+    def list(self, request, *args, **kwargs):
+        fields = self.get_sparse_fields()
+        expand = self.get_expand()
+        # Курсору нужны значения полей сортировки, даже если их не просили.
+        ordering = [field.lstrip('-')
+                    for field in getattr(self.paginator, 'ordering', ())]
+        queryset = self.values_serializer_class.values(
+            self.filter_queryset(self.get_queryset()), fields, expand,
+            ordering
+        )
+        page = self.paginate_queryset(queryset)
+        serializer = self.values_serializer_class(
+            queryset if page is None else page, fields, expand
+        )
+        if page is None:
+            return Response(serializer.data)
+        return self.get_paginated_response(serializer.data)
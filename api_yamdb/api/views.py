@@ -1,6 +1,12 @@
+from api.async_views import AsyncCachedReadMixin
+from api.authentication import get_access_token
+from api.cache import CachedListMixin, CachedRetrieveMixin, response_cache
 from api.filters import TitleFilter
+from api.metrics import registry
+from api.pagination import PubDatePagination, TitlePagination
 from api.permission import (IsAdmin, IsAdminOrReadOnly,
                             IsAuthorOrModeratorOrAdmin)
+from api.search import RankedSearchFilter
 from api.serializers import (CategorySerializer,
                              CheckConfirmationCodeSerializer,
                              CommentsSerializer,
@@ -8,20 +14,28 @@ from api.serializers import (CategorySerializer,
                              GetTitleSerializer, IsNotAdminUserSerializer,
                              ReviewsSerializer, SendCodeSerializer,
                              UserSerializer)
+from api.throttling import GetJwtThrottle, SendCodeThrottle
+from api.values import (CommentValuesSerializer, ReviewValuesSerializer,
+                        TitleStatsValuesSerializer, TitleValuesSerializer,
+                        ValuesListMixin, first_comments, split_param)
 from django.contrib.auth.tokens import default_token_generator
-from django.core.mail import send_mail
-from django.db.models import Avg
-from django.shortcuts import get_object_or_404
+from django.core.handlers.asgi import ASGIRequest
+from django.db import IntegrityError, transaction
+from django.db.models import Prefetch
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils import timezone
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework import filters, mixins, status, viewsets
-from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework import mixins, serializers, status, viewsets
+from rest_framework.decorators import (action, api_view, permission_classes,
+                                       throttle_classes)
 from rest_framework.filters import SearchFilter
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.generics import get_object_or_404
 from rest_framework.permissions import (AllowAny, IsAuthenticated,
                                         IsAuthenticatedOrReadOnly)
 from rest_framework.response import Response
-from rest_framework_simplejwt.tokens import AccessToken
-from reviews.models import Category, Comment, Genre, Review, Title, User
+from reviews.dump import iter_dump, spool_dump
+from reviews.mail import enqueue_mail
+from reviews.models import Category, Genre, Review, Title, User
 
 from api_yamdb.settings import EMAIL
 
@@ -36,117 +50,290 @@ class ListCreateDelet(
     pass
 
 
-class CategoryViewSet(ListCreateDelet):
+class CategoryViewSet(CachedListMixin, ListCreateDelet):
     """Обрабатываем запросы к БД с категориями произведений."""
+    cache_namespace = 'categories'
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
     lookup_field = 'slug'
-    filter_backends = (filters.SearchFilter,)
+    filter_backends = (RankedSearchFilter,)
     search_fields = ('name',)
     permission_classes = (IsAdminOrReadOnly,)
 
 
-class GenreViewSet(ListCreateDelet):
+class GenreViewSet(CachedListMixin, ListCreateDelet):
     """Обрабатываем запросы к БД с жанрами произведений."""
+    cache_namespace = 'genres'
     queryset = Genre.objects.all()
     serializer_class = GenreSerializer
     lookup_field = 'slug'
-    filter_backends = (filters.SearchFilter,)
+    filter_backends = (RankedSearchFilter,)
     search_fields = ('name',)
     permission_classes = (IsAdminOrReadOnly,)
 
 
-class TitleViewSet(viewsets.ModelViewSet):
+class TitleViewSet(AsyncCachedReadMixin, CachedListMixin, CachedRetrieveMixin,
+                   ValuesListMixin, viewsets.ModelViewSet):
     """Обрабатываем запросы к БД с произведениями."""
-    queryset = Title.objects.all().annotate(rating=Avg('reviews__score'))
+    cache_namespace = 'titles'
+    queryset = Title.objects.select_related(
+        'category'
+    ).prefetch_related(Prefetch('genre', Genre.objects.order_by('pk')))
+    values_serializer_class = TitleValuesSerializer
     serializer_class = CreateEditDeleteTitleSerializer
     filter_backends = (DjangoFilterBackend,)
     filterset_class = TitleFilter
     permission_classes = (IsAdminOrReadOnly,)
-    pagination_class = PageNumberPagination
+    pagination_class = TitlePagination
+    full_comments = 3
+    max_full_comments = 20
+    max_stats_ids = 100
 
     def get_serializer_class(self):
         if self.action in ['list', 'retrieve']:
             return GetTitleSerializer
         return CreateEditDeleteTitleSerializer
 
+    def get_comments_limit(self):
+        try:
+            limit = int(self.request.query_params.get(
+                'comments', self.full_comments
+            ))
+        except ValueError:
+            return self.full_comments
+        return max(0, min(limit, self.max_full_comments))
+
+    @action(methods=['GET'], detail=True, url_path='full')
+    def full(self, request, pk=None):
+        """Произведение, первая страница отзывов и первые комментарии
+        к ним за фиксированное число запросов."""
+        title = get_object_or_404(
+            TitleValuesSerializer.values(self.get_queryset()), pk=pk
+        )
+        data = TitleValuesSerializer([title]).data[0]
+        reviews = Review.objects.filter(title_id=pk).order_by('pub_date', 'id')
+        page_size = PubDatePagination().get_page_size(request)
+        count = reviews.count()
+        page = list(ReviewValuesSerializer.values(reviews)[:page_size])
+        totals, comments = first_comments(
+            [review['id'] for review in page], self.get_comments_limit()
+        )
+        results = ReviewValuesSerializer(page).data
+        for review in results:
+            review['comments'] = {
+                'count': totals[review['id']],
+                'results': CommentValuesSerializer(
+                    comments[review['id']]
+                ).data,
+            }
+        next_page = None
+        if count > page_size:
+            next_page = request.build_absolute_uri(
+                f'{request.path[:-len("full/")]}reviews/'
+                f'?page=2&page_size={page_size}'
+            )
+        data['reviews'] = {'count': count, 'next': next_page,
+                           'results': results}
+        return Response(data)
+
+    def get_stats_rows(self, ids):
+        return TitleStatsValuesSerializer.values(
+            Title.objects.filter(pk__in=ids).order_by()
+        )
+
+    @action(methods=['GET'], detail=True, url_path='stats')
+    def stats(self, request, pk=None):
+        """Гистограмма, число, среднее и медиана оценок произведения."""
+        return self.cached_response(
+            self.get_stats, (self.cache_namespace, f'titles:{pk}'),
+            request, pk=pk
+        )
+
+    def get_stats(self, request, pk=None):
+        # pk из URL не проверен: нечисловой id должен дать 404.
+        row = get_object_or_404(
+            TitleStatsValuesSerializer.values(Title.objects.order_by()), pk=pk
+        )
+        return Response(TitleStatsValuesSerializer([row]).data[0])
+
+    @action(methods=['GET'], detail=False, url_path='stats',
+            url_name='bulk-stats')
+    def bulk_stats(self, request):
+        """Статистика оценок нескольких произведений: ?ids=1,2,3."""
+        return self.cached_response(
+            self.get_bulk_stats, (self.cache_namespace, 'titles:list'),
+            request
+        )
 
-class ReviewsViewSet(viewsets.ModelViewSet):
+    def get_bulk_stats(self, request):
+        try:
+            ids = list(dict.fromkeys(
+                int(pk) for pk in
+                split_param(request.query_params.get('ids', ''))
+            ))
+        except ValueError:
+            raise serializers.ValidationError(
+                {'ids': 'Ожидается список id через запятую'}
+            )
+        if not ids or len(ids) > self.max_stats_ids:
+            raise serializers.ValidationError(
+                {'ids': f'Укажите от 1 до {self.max_stats_ids} id'}
+            )
+        rows = {row['id']: row for row in self.get_stats_rows(ids)}
+        return Response(TitleStatsValuesSerializer(
+            [rows[pk] for pk in ids if pk in rows]
+        ).data)
+
+
+class ReviewsViewSet(AsyncCachedReadMixin, CachedListMixin, ValuesListMixin,
+                     viewsets.ModelViewSet):
     """Обрабатываем запросы к БД с отзывами"""
+    cache_namespace = 'reviews'
     serializer_class = ReviewsSerializer
-    pagination_class = PageNumberPagination
+    values_serializer_class = ReviewValuesSerializer
+    pagination_class = PubDatePagination
     permission_classes = (IsAuthenticatedOrReadOnly,
                           IsAuthorOrModeratorOrAdmin)
 
+    def get_list_namespaces(self):
+        # Любое изменение отзыва сбрасывает версию его произведения.
+        return (self.cache_namespace, f'titles:{self.kwargs["titles_id"]}')
+
     def get_queryset(self):
         title = get_object_or_404(Title, id=self.kwargs.
                                   get("titles_id"))
-        return title.reviews.all()
+        return title.reviews.select_related(
+            'author'
+        ).order_by('pub_date', 'id')
 
+    @transaction.atomic
     def perform_create(self, serializer):
         serializer.save(author=self.request.user,
                         title=get_object_or_404
                         (Title, pk=self.kwargs.get("titles_id")))
 
+    @transaction.atomic
+    def perform_update(self, serializer):
+        # Старая оценка читается и сдвигается сигналами отзыва.
+        serializer.save()
+
 
-class CommentsViewSet(viewsets.ModelViewSet):
+class CommentsViewSet(AsyncCachedReadMixin, CachedListMixin, ValuesListMixin,
+                      viewsets.ModelViewSet):
     """Обрабатываем запросы к БД с комментариями"""
-    queryset = Comment.objects.all()
+    cache_namespace = 'comments'
     serializer_class = CommentsSerializer
-    pagination_class = PageNumberPagination
+    values_serializer_class = CommentValuesSerializer
+    pagination_class = PubDatePagination
     permission_classes = (IsAuthenticatedOrReadOnly,
                           IsAuthorOrModeratorOrAdmin)
 
+    def get_list_namespaces(self):
+        # Удаление отзыва или произведения сбрасывает версию произведения:
+        # без нее закэшированный пустой список пережил бы отзыв.
+        return (self.cache_namespace,
+                f'comments:{self.kwargs["review_id"]}',
+                f'titles:{self.kwargs["titles_id"]}')
+
+    def get_review(self):
+        return get_object_or_404(Review,
+                                 pk=self.kwargs.get("review_id"),
+                                 title_id=self.kwargs.get("titles_id"))
+
+    def get_queryset(self):
+        return self.get_review().comments.select_related(
+            'author'
+        ).order_by('pub_date', 'id')
+
     def perform_create(self, serializer):
         serializer.save(author=self.request.user,
-                        reviews=get_object_or_404
-                        (Review, pk=self.kwargs.get("review_id")))
+                        reviews=self.get_review())
 
 
 @api_view(["POST"])
 @permission_classes([AllowAny])
+@throttle_classes([GetJwtThrottle])
 def get_jwt(request):
-    username = request.data.get("username")
-    confirmation_code = request.data.get("confirmation_code")
     serializer = CheckConfirmationCodeSerializer(data=request.data)
 
     if serializer.is_valid():
+        username = serializer.validated_data["username"]
+        confirmation_code = serializer.validated_data["confirmation_code"]
         try:
             user = User.objects.get(username=username)
         except User.DoesNotExist:
             return Response(serializer.errors,
                             status=status.HTTP_404_NOT_FOUND)
         if default_token_generator.check_token(user, confirmation_code):
-            token = AccessToken.for_user(user)
-            user.confirmation_code = 0
-            user.save()
+            token = get_access_token(user)
+            # Код зависит от last_login: после входа он перестает работать.
+            user.last_login = timezone.now()
+            user.save(update_fields=["last_login"])
             return Response({"access": str(token)})
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
 @api_view(["POST"])
 @permission_classes([AllowAny])
+@throttle_classes([SendCodeThrottle])
 def send_code(request):
     serializer = SendCodeSerializer(data=request.data)
     serializer.is_valid(raise_exception=True)
-    email = request.data.get("email", False)
-    username = request.data.get("username", False)
-    user = User.objects.get_or_create(username=username, email=email)[0]
+    email = serializer.validated_data["email"]
+    user = serializer.validated_data.get("user")
+    if user is None:
+        username = serializer.validated_data["username"]
+        try:
+            with transaction.atomic():
+                user = User.objects.create(username=username, email=email)
+        except IntegrityError:
+            # Тот же пользователь зарегистрировался параллельным запросом.
+            user = get_object_or_404(User, username=username, email=email)
+    # Код подписан и проверяется по состоянию пользователя,
+    # поэтому хранить его в строке пользователя не нужно.
     token = default_token_generator.make_token(user)
-    user.confirmation_code = token
-    user.save()
-    send_mail(
-        "Code",
-        token,
-        EMAIL,
-        [email],
-        fail_silently=False,
-    )
+    enqueue_mail("Code", token, EMAIL, email)
     return Response(
         serializer.initial_data, status=status.HTTP_200_OK
     )
 
 
+@api_view(["GET"])
+@permission_classes([IsAuthenticated, IsAdmin])
+def cache_stats(request):
+    return Response(response_cache.stats())
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated, IsAdmin])
+def metrics(request):
+    """Гистограммы MetricsMiddleware в текстовом формате Prometheus."""
+    return HttpResponse(registry.render(),
+                        content_type='text/plain; version=0.0.4; '
+                                     'charset=utf-8')
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated, IsAdmin])
+def dump_table(request, table, export_format):
+    content_type = {
+        'csv': 'text/csv',
+        'ndjson': 'application/x-ndjson',
+    }[export_format]
+    chunks = iter_dump(table, export_format)
+    if isinstance(request._request, ASGIRequest):
+        # Django 3.2 перебирает потоковый ответ под ASGI в цикле событий,
+        # где ORM недоступен: выгружаем в файл здесь, в потоке запроса.
+        response = FileResponse(spool_dump(chunks),
+                                content_type=content_type)
+    else:
+        response = StreamingHttpResponse(chunks, content_type=content_type)
+    response['Content-Disposition'] = (
+        f'attachment; filename="{table}.{export_format}"'
+    )
+    return response
+
+
 class UserViewSet(viewsets.ModelViewSet):
     queryset = User.objects.all()
     serializer_class = UserSerializer
@@ -162,16 +349,20 @@ class UserViewSet(viewsets.ModelViewSet):
         permission_classes=(IsAuthenticated,),
         url_path='me')
     def get_current_user_info(self, request):
-        serializer = UserSerializer(request.user)
+        user = request.user
+        if not isinstance(user, User):
+            # На чтение пользователь собран из токена, профиля в нем нет.
+            user = get_object_or_404(User, pk=user.pk)
+        serializer = UserSerializer(user)
         if request.method == 'PATCH':
-            if request.user.is_admin:
+            if user.is_admin:
                 serializer = UserSerializer(
-                    request.user,
+                    user,
                     data=request.data,
                     partial=True)
             else:
                 serializer = IsNotAdminUserSerializer(
-                    request.user,
+                    user,
                     data=request.data,
                     partial=True)
             serializer.is_valid(raise_exception=True)
@@ -18,6 +18,15 @@ ALLOWED_HOSTS = ['158.160.15.30']
 
 EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
 EMAIL = "Aa@mail.ru"
+EMAIL_OUTBOX = {
+    # Отправлять очередь в потоке процесса после коммита. Без него письма
+    # отправляет команда send_emails --interval.
+    'THREAD': os.getenv('EMAIL_OUTBOX_THREAD', default='True') == 'True',
+    'BATCH_SIZE': int(os.getenv('EMAIL_OUTBOX_BATCH_SIZE', default=100)),
+    'MAX_ATTEMPTS': int(os.getenv('EMAIL_OUTBOX_MAX_ATTEMPTS', default=5)),
+    # Пауза перед повторной отправкой после ошибки SMTP.
+    'RETRY_SECONDS': int(os.getenv('EMAIL_OUTBOX_RETRY_SECONDS', default=60)),
+}
 
 AUTH_USER_MODEL = 'reviews.User'
 
@@ -35,6 +44,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.metrics.MetricsMiddleware',
+    'api.middleware.ReplicaMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -66,6 +77,15 @@ TEMPLATES = [
 WSGI_APPLICATION = 'api_yamdb.wsgi.application'
 
 
+# Асинхронные view чтения из кэша; включается в asgi.py.
+ASYNC_VIEWS = os.getenv('ASYNC_VIEWS', default='False') == 'True'
+
+# 'pgbouncer' - соединения идут через pgbouncer в режиме transaction:
+# серверные курсоры там не работают. Пул psycopg появился только
+# в Django 5.1, поэтому другого режима пула нет. infra/docker-compose.yaml
+# запускает приложение под ASGI именно так.
+DB_POOL_MODE = os.getenv('DB_POOL_MODE', default='none')
+
 DATABASES = {
     'default': {
         'ENGINE': os.getenv('DB_ENGINE', default='django.db.backends.postgresql'),
@@ -73,8 +93,81 @@ DATABASES = {
         'USER': os.getenv('POSTGRES_USER', default='postgres'),
         'PASSWORD': os.getenv('POSTGRES_PASSWORD', default='postgres'),
         'HOST': os.getenv('DB_HOST', default='db'),
-        'PORT': os.getenv('DB_PORT', default='5432')
+        'PORT': os.getenv('DB_PORT', default='5432'),
+        # Под ASGI у каждого запроса свой поток, и постоянное соединение
+        # осталось бы за ним открытым: там соединение на запрос дешевое,
+        # потому что открывается к pgbouncer, а тот держит соединения к БД.
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', default=0 if ASYNC_VIEWS else 60)),
+        # Проверка соединения перед запросом, как в Django 4.1
+        # (api.signals.check_db_connections).
+        'CONN_HEALTH_CHECKS': os.getenv('DB_CONN_HEALTH_CHECKS', default='True') == 'True',
+        # Без серверных курсоров iterator() читает выборку целиком:
+        # большие таблицы читаются частями через reviews.models.iter_by_key.
+        'DISABLE_SERVER_SIDE_CURSORS': DB_POOL_MODE == 'pgbouncer',
+    }
+}
+if DATABASES['default']['ENGINE'] == 'django.db.backends.postgresql':
+    DATABASES['default']['OPTIONS'] = {
+        'connect_timeout': int(os.getenv('DB_CONNECT_TIMEOUT', default=5)),
+        # TCP keepalive: сервер и libpq замечают разорванное постоянное
+        # соединение, даже если оно простаивает.
+        'keepalives': 1,
+        'keepalives_idle': int(os.getenv('DB_KEEPALIVES_IDLE', default=60)),
+        'application_name': 'api_yamdb',
     }
+
+# Реплики только для чтения через запятую: host или host:port, для SQLite -
+# пути к файлам. Безопасные запросы читают из случайной реплики, запись и
+# запросы клиента в течение DB_REPLICA_STICKY_SECONDS после его записи
+# идут в default. В тестах реплики смотрят в тестовую default.
+DB_REPLICAS = [replica for replica in os.getenv('DB_REPLICAS', default='').split(',') if replica]
+DB_REPLICA_STICKY_SECONDS = int(os.getenv('DB_REPLICA_STICKY_SECONDS', default=5))
+for number, replica in enumerate(DB_REPLICAS, 1):
+    config = dict(DATABASES['default'], TEST={'MIRROR': 'default'})
+    if config['ENGINE'] == 'django.db.backends.sqlite3':
+        config['NAME'] = replica
+    else:
+        config['HOST'], _, port = replica.partition(':')
+        config['PORT'] = port or config['PORT']
+    DATABASES[f'replica_{number}'] = config
+
+DATABASE_ROUTERS = ['api.replicas.ReplicaRouter']
+
+RESPONSE_CACHE = {
+    'BACKEND': os.getenv('RESPONSE_CACHE_BACKEND', default='api.cache.LocMemBackend'),
+    'LOCATION': os.getenv('RESPONSE_CACHE_LOCATION', default='response-cache'),
+    'TIMEOUT': int(os.getenv('RESPONSE_CACHE_TIMEOUT', default=300)),
+    # Срок жизни версий пространств: версия объекта, который давно
+    # не менялся, истекает и начинается заново с текущего времени.
+    'VERSION_TIMEOUT': int(os.getenv('RESPONSE_CACHE_VERSION_TIMEOUT', default=86400)),
+}
+
+AUTH_CACHE = {
+    'BACKEND': os.getenv('AUTH_CACHE_BACKEND', default='api.cache.LocMemBackend'),
+    'LOCATION': os.getenv('AUTH_CACHE_LOCATION', default='auth-cache'),
+}
+
+# Несколько процессов приложения: хранилища в памяти процесса запрещены
+# проверкой api.E001 (api/checks.py). Включено в infra/docker-compose.yaml.
+SHARED_CACHE_REQUIRED = os.getenv('SHARED_CACHE_REQUIRED', default='False') == 'True'
+
+AUTH_THROTTLES = {
+    'send_code': {
+        'ALGORITHM': 'api.throttling.TokenBucket',
+        'RATES': {'ip': '20/h', 'email': '5/h', 'username': '5/h'},
+    },
+    'get_jwt': {
+        'ALGORITHM': 'api.throttling.SlidingWindow',
+        'RATES': {'ip': '30/m', 'username': '10/m'},
+    },
+}
+
+METRICS = {
+    'ENABLED': os.getenv('METRICS_ENABLED', default='True') == 'True',
+    # Доля запросов под cProfile; сохраняются только медленные из них.
+    'PROFILE_SAMPLE_RATE': float(os.getenv('METRICS_PROFILE_SAMPLE_RATE', default=0)),
+    'PROFILE_SLOW_SECONDS': float(os.getenv('METRICS_PROFILE_SLOW_SECONDS', default=0.5)),
+    'PROFILE_DIR': os.getenv('METRICS_PROFILE_DIR', default=str(BASE_DIR / 'profiles')),
 }
 
 
@@ -113,18 +206,26 @@ MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
 REST_FRAMEWORK = {
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'DEFAULT_PAGINATION_CLASS': 'api.pagination.PageNumberOrCursorPagination',
     'PAGE_SIZE': 5,
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
 
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.StatelessJWTAuthentication',
+    ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
     ],
+    # Перед приложением стоит nginx из infra/: адрес клиента - последний
+    # в X-Forwarded-For, остальные мог прислать сам клиент.
+    'NUM_PROXIES': int(os.getenv('NUM_PROXIES', default=1)),
 }
 
 SIMPLE_JWT = {
-    'ACCESS_TOKEN_LIFETIME': timedelta(days=30),
+    # Пока токен жив, роль на чтение может браться из его claims.
+    'ACCESS_TOKEN_LIFETIME': timedelta(hours=int(os.getenv('ACCESS_TOKEN_HOURS', default=24))),
     'AUTH_HEADER_TYPES': ('Bearer',),
 }
@@ -14,10 +14,11 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 from api.urls import v1_router
-from api.views import get_jwt, send_code
+from api.views import cache_stats, dump_table, get_jwt, metrics, send_code
 from django.contrib import admin
-from django.urls import include, path
+from django.urls import include, path, re_path
 from django.views.generic import TemplateView
+from reviews.dump import FORMATS, TABLES
 
 urlpatterns = [
     path('api/v1/', include(v1_router.urls)),
@@ -29,4 +30,11 @@ urlpatterns = [
     ),
     path('api/v1/auth/signup/', send_code, name='send_code'),
     path('api/v1/auth/token/', get_jwt, name='get_jwt'),
+    path('api/v1/cache/stats/', cache_stats, name='cache_stats'),
+    path('api/v1/metrics/', metrics, name='metrics'),
+    re_path(
+        rf'^api/v1/dump/(?P<table>{"|".join(TABLES)})'
+        rf'\.(?P<export_format>{"|".join(FORMATS)})$',
+        dump_table, name='dump_table'
+    ),
 ]
@@ -1,6 +1,7 @@
 from django.contrib import admin
 
-from .models import Category, Comment, Genre, Review, Title, User
+from .models import (Category, Comment, Genre, OutgoingEmail, Review, Title,
+                     User)
 
 admin.site.register(Title)
 admin.site.register(User)
@@ -8,3 +9,11 @@ admin.site.register(Category)
 admin.site.register(Genre)
 admin.site.register(Review)
 admin.site.register(Comment)
+
+
+@admin.register(OutgoingEmail)
+class OutgoingEmailAdmin(admin.ModelAdmin):
+    # В тексте письма код подтверждения, администратору он не нужен.
+    exclude = ('body',)
+    list_display = ('recipient', 'subject', 'status', 'attempts', 'created')
+    list_filter = ('status',)
@@ -0,0 +1,85 @@
+import csv
+import json
+import tempfile
+from operator import itemgetter
+
+from django.core.serializers.json import DjangoJSONEncoder
+from reviews.models import (Category, Comment, Genre, GenreTitle, Review,
+                            Title, User, iter_by_key)
+
+# Имя таблицы совпадает с именем CSV-файла, который читает load_data.
+# Колонки: (заголовок в файле, поле для values_list).
+TABLES = {
+    'users': (User, (
+        ('id', 'id'), ('username', 'username'), ('email', 'email'),
+        ('role', 'role'), ('bio', 'bio'), ('first_name', 'first_name'),
+        ('last_name', 'last_name'),
+    )),
+    'genre': (Genre, (('id', 'id'), ('name', 'name'), ('slug', 'slug'))),
+    'category': (Category, (
+        ('id', 'id'), ('name', 'name'), ('slug', 'slug'),
+    )),
+    'titles': (Title, (
+        ('id', 'id'), ('name', 'name'), ('year', 'year'),
+        ('category', 'category'), ('description', 'description'),
+        ('rating_sum', 'rating_sum'), ('rating_count', 'rating_count'),
+    )),
+    'genre_title': (GenreTitle, (
+        ('id', 'id'), ('title_id', 'title'), ('genre_id', 'genre'),
+    )),
+    'review': (Review, (
+        ('id', 'id'), ('title_id', 'title'), ('text', 'text'),
+        ('author', 'author'), ('score', 'score'), ('pub_date', 'pub_date'),
+    )),
+    'comments': (Comment, (
+        ('id', 'id'), ('review_id', 'reviews'), ('text', 'text'),
+        ('author', 'author'), ('pub_date', 'pub_date'),
+    )),
+}
+FORMATS = ('csv', 'ndjson')
+
+
+class Echo:
+    """Псевдофайл для csv.writer: возвращает строку вместо записи."""
+
+    def write(self, value):
+        return value
+
+
+def iter_rows(table, chunk_size):
+    # Первая колонка каждой таблицы - id.
+    model, columns = TABLES[table]
+    return iter_by_key(
+        model.objects.values_list(*(field for _, field in columns)),
+        'pk', itemgetter(0), chunk_size,
+    )
+
+
+def iter_csv(table, chunk_size=2000):
+    writer = csv.writer(Echo())
+    yield writer.writerow([header for header, _ in TABLES[table][1]])
+    for row in iter_rows(table, chunk_size):
+        yield writer.writerow(row)
+
+
+def iter_ndjson(table, chunk_size=2000):
+    headers = [header for header, _ in TABLES[table][1]]
+    for row in iter_rows(table, chunk_size):
+        yield json.dumps(dict(zip(headers, row)), cls=DjangoJSONEncoder,
+                         ensure_ascii=False) + '\n'
+
+
+def iter_dump(table, export_format, chunk_size=2000):
+    """Построчно выгружаем таблицу, не держа ее в памяти целиком."""
+    if export_format == 'csv':
+        return iter_csv(table, chunk_size)
+    return iter_ndjson(table, chunk_size)
+
+
+def spool_dump(chunks):
+    """Записываем выгрузку во временный файл и отдаем его с начала."""
+    dump = tempfile.TemporaryFile()
+    for chunk in chunks:
+        dump.write(chunk.encode())
+    dump.seek(0)
+    return dump
@@ -0,0 +1,142 @@
+import logging
+import smtplib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import connection, transaction
+from django.utils import timezone
+from reviews.models import OutgoingEmail
+
+logger = logging.getLogger(__name__)
+
+# Сколько письмо считается занятым отправителем: если процесс упадет
+# посреди отправки, по истечении срока письмо снова уйдет в очередь.
+SEND_LEASE = timedelta(minutes=10)
+
+_executor = None
+_retry = None
+_retry_lock = threading.Lock()
+
+
+def enqueue_mail(subject, body, from_email, recipient):
+    """Ставим письмо в очередь; отправка после коммита, вне запроса."""
+    OutgoingEmail.objects.create(
+        subject=subject, body=body, from_email=from_email,
+        recipient=recipient,
+    )
+    if settings.EMAIL_OUTBOX['THREAD']:
+        transaction.on_commit(schedule_send)
+
+
+def schedule_send():
+    global _executor
+    if _executor is None:
+        # Один поток: письма процесса уходят по очереди через одно
+        # соединение, а запросы не ждут SMTP-сервер.
+        _executor = ThreadPoolExecutor(max_workers=1)
+    _executor.submit(send_in_thread)
+
+
+def schedule_retry():
+    """Повторяем отправку по таймеру, не дожидаясь новых писем."""
+    global _retry
+    with _retry_lock:
+        if _retry is not None and _retry.is_alive():
+            return
+        _retry = threading.Timer(settings.EMAIL_OUTBOX['RETRY_SECONDS'],
+                                 schedule_send)
+        _retry.daemon = True
+        _retry.start()
+
+
+def send_in_thread():
+    failed = 0
+    try:
+        _, failed = send_pending()
+    except Exception:
+        logger.exception('Не удалось отправить письма из очереди')
+        failed = 1
+    finally:
+        connection.close()
+    if failed:
+        schedule_retry()
+
+
+def deliver(email, mail_connection, max_attempts):
+    email.attempts += 1
+    try:
+        EmailMessage(email.subject, email.body, email.from_email,
+                     [email.recipient], connection=mail_connection).send()
+    except Exception as error:
+        # Не только SMTP: письмо с ошибкой в заголовке или кодировке
+        # тоже тратит попытку и не прерывает пачку.
+        if not isinstance(error, (smtplib.SMTPException, OSError)):
+            logger.exception('Письмо %s не собрано', email.pk)
+        email.error = str(error)
+        email.next_attempt = timezone.now() + timedelta(
+            seconds=settings.EMAIL_OUTBOX['RETRY_SECONDS']
+        )
+        if email.attempts >= max_attempts:
+            email.status = OutgoingEmail.FAILED
+            email.body = ''
+        return False
+    email.status = OutgoingEmail.SENT
+    email.sent = timezone.now()
+    email.error = ''
+    email.body = ''
+    return True
+
+
+def claim_pending(batch_size):
+    """Забираем пачку писем, которым пора уходить.
+
+    Строки заблокированы только на время этой транзакции: письма
+    получают next_attempt через SEND_LEASE, и другие отправители
+    пропускают их, пока идет отправка.
+    """
+    lock = {}
+    if connection.features.has_select_for_update_skip_locked:
+        lock = {'skip_locked': True}
+    now = timezone.now()
+    with transaction.atomic():
+        emails = list(
+            OutgoingEmail.objects.select_for_update(**lock).filter(
+                status=OutgoingEmail.PENDING, next_attempt__lte=now
+            ).order_by('id')[:batch_size]
+        )
+        OutgoingEmail.objects.filter(
+            pk__in=[email.pk for email in emails]
+        ).update(next_attempt=now + SEND_LEASE)
+    return emails
+
+
+def send_pending(batch_size=None, max_attempts=None):
+    """Отправляем письма из очереди пачками через одно SMTP-соединение.
+
+    SMTP не держит блокировки строк. Неотправленное письмо повторяется
+    через RETRY_SECONDS, пока не исчерпает max_attempts.
+    Возвращаем (отправлено, ошибок).
+    """
+    batch_size = batch_size or settings.EMAIL_OUTBOX['BATCH_SIZE']
+    max_attempts = max_attempts or settings.EMAIL_OUTBOX['MAX_ATTEMPTS']
+    sent = failed = 0
+    while True:
+        emails = claim_pending(batch_size)
+        if not emails:
+            return sent, failed
+        try:
+            with get_connection() as mail_connection:
+                for email in emails:
+                    if deliver(email, mail_connection, max_attempts):
+                        sent += 1
+                    else:
+                        failed += 1
+        finally:
+            # Отправленные до ошибки соединения письма не уйдут повторно.
+            OutgoingEmail.objects.bulk_update(
+                emails, ('status', 'attempts', 'error', 'sent', 'body',
+                         'next_attempt'),
+            )
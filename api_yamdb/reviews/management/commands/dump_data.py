@@ -0,0 +1,42 @@
+import os
+
+from django.core.management import BaseCommand
+from reviews.dump import FORMATS, TABLES, iter_dump
+
+
+class Command(BaseCommand):
+    help = 'Выгружает каталог в файлы, которые читает load_data.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path', required=True,
+            help='Каталог для файлов выгрузки. Не static/data: там '
+                 'исходные файлы load_data.',
+        )
+        parser.add_argument(
+            '--format', choices=FORMATS, default='csv',
+            help='Формат файлов.',
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=2000,
+            help='Число строк, читаемых из БД за один раз.',
+        )
+        parser.add_argument(
+            '--tables', nargs='+', choices=TABLES, default=list(TABLES),
+            help='Выгружаемые таблицы.',
+        )
+
+    def handle(self, *args, **options):
+        os.makedirs(options['path'], exist_ok=True)
+        for table in options['tables']:
+            path = os.path.join(options['path'],
+                                f'{table}.{options["format"]}')
+            rows = 0
+            with open(path, 'w', encoding='utf-8', newline='') as file:
+                for line in iter_dump(table, options['format'],
+                                      options['chunk_size']):
+                    file.write(line)
+                    rows += 1
+            if options['format'] == 'csv':
+                rows -= 1
+            self.stdout.write(f'{path}: {rows} строк')
@@ -1,47 +1,346 @@
+import csv
+import io
+import json
+import os
+import time
+import uuid
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from contextlib import contextmanager
 from csv import DictReader
+from itertools import count, islice
 
-from django.core.management import BaseCommand
-from reviews.models import Category, Comment, Genre, Review, Title, User
+import django
+from django.core.management import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, connections, transaction
+from reviews.models import (Category, Comment, Genre, GenreTitle, Review,
+                            Title, TitleStats, User)
+from reviews.signals import bulk_changed
+
+# Файлы одной стадии не ссылаются друг на друга и грузятся параллельно.
+STAGES = (
+    ('users.csv', 'genre.csv', 'category.csv'),
+    ('titles.csv',),
+    ('genre_title.csv', 'review.csv'),
+    ('comments.csv',),
+)
+PARALLEL_CHUNK_SIZE = 10000
+COPY_NULL = '\\N'
+
+
+@contextmanager
+def keep_pub_date(*models):
+    """Отключаем auto_now_add, чтобы сохранить даты из CSV."""
+    fields = [model._meta.get_field('pub_date') for model in models]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+def read_chunks(path, chunk_size):
+    """Отдаем строки файла частями; при chunk_size=0 весь файл потоком."""
+    with open(path, encoding='utf-8', newline='') as file:
+        reader = DictReader(file)
+        rows = ((reader.line_num, row) for row in reader)
+        if not chunk_size:
+            yield 0, rows
+            return
+        for index in count():
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                return
+            yield index, chunk
+
+
+def copy_objects(model, objects, ignore_conflicts):
+    """Загружаем объекты через COPY FROM STDIN в PostgreSQL."""
+    fields = [
+        field for field in model._meta.concrete_fields
+        if not (field.primary_key and objects[0].pk is None)
+    ]
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for obj in objects:
+        values = (field.get_db_prep_save(field.pre_save(obj, True),
+                                         connection)
+                  for field in fields)
+        writer.writerow([COPY_NULL if value is None else value
+                         for value in values])
+    buffer.seek(0)
+    quote = connection.ops.quote_name
+    table = quote(model._meta.db_table)
+    columns = ', '.join(quote(field.column) for field in fields)
+    copy = f"({columns}) FROM STDIN WITH (FORMAT csv, NULL '{COPY_NULL}')"
+    with connection.cursor() as cursor:
+        if not ignore_conflicts:
+            cursor.copy_expert(f'COPY {table} {copy}', buffer)
+            return
+        cursor.execute(
+            f'CREATE TEMP TABLE load_data_copy AS '
+            f'SELECT {columns} FROM {table} WITH NO DATA'
+        )
+        cursor.copy_expert(f'COPY load_data_copy {copy}', buffer)
+        cursor.execute(
+            f'INSERT INTO {table} ({columns}) SELECT {columns} '
+            f'FROM load_data_copy ON CONFLICT DO NOTHING'
+        )
+        cursor.execute('DROP TABLE load_data_copy')
+
+
+def save_objects(model, objects, ignore_conflicts):
+    if connection.vendor == 'postgresql':
+        copy_objects(model, objects, ignore_conflicts)
+    else:
+        model.objects.bulk_create(objects, len(objects),
+                                  ignore_conflicts=ignore_conflicts)
+
+
+class CsvLoader:
+    """Строим объекты из строк CSV и проверяем внешние ключи по id в памяти.
+
+    Загрузчик живет одну стадию: файлы предыдущих стадий уже закоммичены,
+    поэтому множества id читаются из БД один раз при первом обращении.
+    """
+
+    def __init__(self, run, stage):
+        self.key = (run, stage)
+        self.ids = {}
+        self.line = None
+        self.files = {
+            'users.csv': (User, self.build_user),
+            'genre.csv': (Genre, self.build_genre),
+            'category.csv': (Category, self.build_category),
+            'titles.csv': (Title, self.build_title),
+            'genre_title.csv': (GenreTitle, self.build_genre_title),
+            'review.csv': (Review, self.build_review),
+            'comments.csv': (Comment, self.build_comment),
+        }
+
+    def load(self, filename, rows, batch_size, ignore_conflicts):
+        model, build = self.files[filename]
+        loaded = 0
+        with keep_pub_date(Review, Comment), transaction.atomic():
+            objects = (self.build(build, line, row) for line, row in rows)
+            while True:
+                batch = list(islice(objects, batch_size))
+                if not batch:
+                    return loaded
+                save_objects(model, batch, ignore_conflicts)
+                loaded += len(batch)
+
+    def build(self, build, line, row):
+        self.line = line
+        return build(row)
+
+    def get_ids(self, model):
+        if model not in self.ids:
+            self.ids[model] = set(
+                model.objects.values_list('pk', flat=True)
+            )
+        return self.ids[model]
+
+    def fk(self, model, pk):
+        if int(pk) not in self.get_ids(model):
+            raise CommandError(
+                f'Строка {self.line}: нет объекта '
+                f'{model.__name__} с id={pk}'
+            )
+        return pk
+
+    def build_user(self, row):
+        return User(id=row['id'], username=row['username'],
+                    email=row['email'], role=row['role'], bio=row['bio'],
+                    first_name=row['first_name'],
+                    last_name=row['last_name'])
+
+    def build_genre(self, row):
+        return Genre(id=row['id'], name=row['name'], slug=row['slug'])
+
+    def build_category(self, row):
+        return Category(id=row['id'], name=row['name'], slug=row['slug'])
+
+    def build_title(self, row):
+        return Title(id=row['id'], name=row['name'], year=row['year'],
+                     description=row.get('description') or None,
+                     category_id=(self.fk(Category, row['category'])
+                                  if row['category'] else None))
+
+    def build_genre_title(self, row):
+        return GenreTitle(id=row.get('id') or None,
+                          title_id=self.fk(Title, row['title_id']),
+                          genre_id=self.fk(Genre, row['genre_id']))
+
+    def build_review(self, row):
+        return Review(id=row['id'],
+                      title_id=self.fk(Title, row['title_id']),
+                      author_id=self.fk(User, row['author']),
+                      text=row['text'], score=row['score'],
+                      pub_date=row['pub_date'])
+
+    def build_comment(self, row):
+        return Comment(id=row['id'],
+                       reviews_id=self.fk(Review, row['review_id']),
+                       author_id=self.fk(User, row['author']),
+                       text=row['text'], pub_date=row['pub_date'])
+
+
+_loader = None
+
+
+def load_chunk(run, stage, filename, rows, batch_size, ignore_conflicts):
+    """Загружаем часть файла в своей транзакции, в том числе в воркере."""
+    global _loader
+    if _loader is None or _loader.key != (run, stage):
+        _loader = CsvLoader(run, stage)
+    return _loader.load(filename, rows, batch_size, ignore_conflicts)
+
+
+class Checkpoint:
+    """Список закоммиченных частей файлов для продолжения загрузки."""
+
+    def __init__(self, path, chunk_size, resume):
+        self.path = path
+        self.chunk_size = chunk_size
+        self.done = set()
+        if resume and os.path.exists(path):
+            with open(path, encoding='utf-8') as file:
+                data = json.load(file)
+            if data['chunk_size'] != chunk_size:
+                raise CommandError(
+                    f'Загрузка начата с --chunk-size {data["chunk_size"]}'
+                )
+            self.done = set(data['done'])
+
+    def __contains__(self, unit):
+        return unit in self.done
+
+    def add(self, unit):
+        self.done.add(unit)
+        with open(f'{self.path}.tmp', 'w', encoding='utf-8') as file:
+            json.dump({'chunk_size': self.chunk_size,
+                       'done': sorted(self.done)}, file)
+        os.replace(f'{self.path}.tmp', self.path)
+
+    def remove(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
 
 
 class Command(BaseCommand):
+    help = 'Загружает данные из CSV-файлов в БД пакетами.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path', default='static/data',
+            help='Каталог с CSV-файлами.',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Число строк в одном INSERT или COPY.',
+        )
+        parser.add_argument(
+            '--workers', type=int, default=1,
+            help='Число процессов для параллельной загрузки.',
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=0,
+            help='Число строк в одной транзакции; 0 - весь файл. '
+                 f'С --workers по умолчанию {PARALLEL_CHUNK_SIZE}.',
+        )
+        parser.add_argument(
+            '--resume', action='store_true',
+            help='Продолжить прерванную загрузку с последней части.',
+        )
+        parser.add_argument(
+            '--checkpoint',
+            help='Файл с прогрессом загрузки; по умолчанию в --path.',
+        )
+
     def handle(self, *args, **options):
-        for row in DictReader(open('static/data/users.csv')):
-            User.objects.create(id=row['id'], username=row['username'],
-                                email=row['email'], role=row['role'],
-                                bio=row['bio'], first_name=row['first_name'],
-                                last_name=row['last_name'],)
-
-        for row in DictReader(open('static/data/genre.csv')):
-            Genre.objects.create(id=row['id'], name=row['name'],
-                                 slug=row['slug'],)
-
-        for row in DictReader(open('static/data/category.csv')):
-            Category.objects.create(id=row['id'],
-                                    name=row['name'], slug=row['slug'])
-
-        for row in DictReader(open('static/data/titles.csv')):
-            category = Category.objects.get(id=row['category'])
-            Title.objects.create(id=row['id'], name=row['name'],
-                                 year=row['year'],
-                                 category=category)
-
-        for row in DictReader(open('static/data/genre_title.csv')):
-            obj = Genre.objects.get(id=row['genre_id'])
-            Title.objects.get(id=row['title_id']).genre.add(obj)
-
-        for row in DictReader(open('static/data/review.csv')):
-            title = Title.objects.get(id=row['title_id'])
-            author = User.objects.get(id=row['author'])
-            Review.objects.create(id=row['id'], text=row['text'],
-                                  author=author, titles=title,
-                                  score=row['score'],
-                                  pub_date=row['pub_date'])
-
-        for row in DictReader(open('static/data/comments.csv')):
-            review = Review.objects.get(id=row['review_id'])
-
-            author = User.objects.get(id=row['author'])
-            Comment.objects.create(id=row['id'], reviews=review,
-                                   text=row['text'], author=author,
-                                   pub_date=row['pub_date'])
+        self.options = options
+        if options['workers'] > 1 and not options['chunk_size']:
+            options['chunk_size'] = PARALLEL_CHUNK_SIZE
+        self.checkpoint = Checkpoint(
+            options['checkpoint'] or os.path.join(
+                options['path'], '.load_data_checkpoint.json'
+            ),
+            options['chunk_size'], options['resume'],
+        )
+        parallel = options['workers'] > 1
+        if parallel and connection.vendor == 'sqlite':
+            self.stderr.write('SQLite не поддерживает параллельную запись, '
+                              'загружаем в одном процессе')
+            parallel = False
+        run = uuid.uuid4().hex
+        for stage, filenames in enumerate(STAGES):
+            tasks = self.get_tasks(run, stage, filenames)
+            if parallel:
+                self.run_parallel(tasks)
+            else:
+                self.run_serial(tasks)
+        self.reset_sequences()
+        Title.objects.recalculate_rating()
+        TitleStats.objects.rebuild()
+        bulk_changed.send(sender=self.__class__)
+        self.checkpoint.remove()
+
+    def get_tasks(self, run, stage, filenames):
+        self.stats = {}
+        for filename in filenames:
+            self.stats[filename] = [0, time.monotonic(), None]
+            path = os.path.join(self.options['path'], filename)
+            for index, rows in read_chunks(path,
+                                           self.options['chunk_size']):
+                unit = f'{filename}:{index}'
+                if unit not in self.checkpoint:
+                    yield unit, (run, stage, filename, rows,
+                                 self.options['batch_size'],
+                                 self.options['resume'])
+
+    def run_serial(self, tasks):
+        for unit, args in tasks:
+            self.chunk_done(unit, load_chunk(*args))
+        self.report()
+
+    def run_parallel(self, tasks):
+        # Воркеры не должны унаследовать открытое соединение с БД.
+        connections.close_all()
+        pending = {}
+        with ProcessPoolExecutor(self.options['workers'],
+                                 initializer=django.setup) as executor:
+            for unit, args in tasks:
+                pending[executor.submit(load_chunk, *args)] = unit
+                if len(pending) >= self.options['workers'] * 2:
+                    self.collect(pending)
+            while pending:
+                self.collect(pending)
+        self.report()
+
+    def collect(self, pending):
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            self.chunk_done(pending.pop(future), future.result())
+
+    def chunk_done(self, unit, rows):
+        self.checkpoint.add(unit)
+        stats = self.stats[unit.rsplit(':', 1)[0]]
+        stats[0] += rows
+        stats[2] = time.monotonic()
+
+    def report(self):
+        for filename, (rows, started, finished) in self.stats.items():
+            elapsed = (finished or started) - started
+            self.stdout.write(
+                f'{filename}: {rows} строк за {elapsed:.2f} с, '
+                f'{rows / elapsed if elapsed else rows:.0f} строк/с'
+            )
+
+    def reset_sequences(self):
+        models = [Category, Comment, Genre, GenreTitle, Review, Title, User]
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(no_style(), models):
+                cursor.execute(sql)
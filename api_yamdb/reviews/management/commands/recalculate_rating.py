@@ -0,0 +1,38 @@
+from django.core.management import BaseCommand, CommandError
+from reviews.models import Title, TitleStats
+from reviews.signals import bulk_changed
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает сохраненный рейтинг и гистограммы оценок '
+            'произведений по отзывам.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check', action='store_true',
+            help='Только проверить расхождения, ничего не меняя.',
+        )
+
+    def handle(self, *args, **options):
+        drifted = 0
+        for title in Title.objects.rating_drift().iterator():
+            drifted += 1
+            self.stdout.write(
+                f'{title.pk}: сохранено {title.rating_sum}/'
+                f'{title.rating_count}, по отзывам '
+                f'{title.actual_sum}/{title.actual_count}'
+            )
+        if options['check']:
+            if drifted:
+                raise CommandError(
+                    f'Рейтинг разошелся у {drifted} произведений'
+                )
+            self.stdout.write('Расхождений нет')
+            return
+        updated = Title.objects.recalculate_rating()
+        TitleStats.objects.rebuild()
+        bulk_changed.send(sender=self.__class__)
+        self.stdout.write(self.style.SUCCESS(
+            f'Пересчитано {updated} произведений, '
+            f'исправлено расхождений: {drifted}'
+        ))
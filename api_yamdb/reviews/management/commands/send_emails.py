@@ -0,0 +1,32 @@
+import time
+
+from django.core.management import BaseCommand
+from reviews.mail import send_pending
+
+
+class Command(BaseCommand):
+    help = 'Отправляет письма из очереди через одно SMTP-соединение.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int,
+            help='Число писем на одно соединение.',
+        )
+        parser.add_argument(
+            '--max-attempts', type=int,
+            help='Число попыток, после которого письмо помечается ошибкой.',
+        )
+        parser.add_argument(
+            '--interval', type=float, default=0,
+            help='Повторять каждые N секунд; 0 - отправить один раз.',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            sent, failed = send_pending(options['batch_size'],
+                                        options['max_attempts'])
+            if sent or failed or not options['interval']:
+                self.stdout.write(f'Отправлено: {sent}, ошибок: {failed}')
+            if not options['interval']:
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,38 @@
+from django.db import migrations
+
+# Title фильтруется по name__contains (LIKE), категории и жанры -
+# SearchFilter по name__icontains (UPPER(name) LIKE UPPER(...)).
+INDEXES = (
+    ('title_name_trgm_idx', 'reviews_title', 'name'),
+    ('category_name_trgm_idx', 'reviews_category', 'UPPER(name)'),
+    ('genre_name_trgm_idx', 'reviews_genre', 'UPPER(name)'),
+)
+
+
+def create_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for name, table, expression in INDEXES:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {name} ON {table} '
+            f'USING gin (({expression}) gin_trgm_ops)'
+        )
+
+
+def drop_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, _, _ in INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0005_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 3.2 on 2026-10-18 04:07
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+def clear_sent_bodies(apps, schema_editor):
+    # В отправленных письмах остались коды подтверждения.
+    OutgoingEmail = apps.get_model('reviews', 'OutgoingEmail')
+    OutgoingEmail.objects.exclude(status='pending').update(body='')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0010_genre_title_big_id'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='outgoingemail',
+            name='next_attempt',
+            field=models.DateTimeField(default=django.utils.timezone.now, verbose_name='следующая попытка'),
+        ),
+        migrations.RunPython(clear_sent_bodies, migrations.RunPython.noop),
+    ]
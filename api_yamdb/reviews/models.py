@@ -1,10 +1,30 @@
+from operator import itemgetter
+
 from django.contrib.auth.base_user import BaseUserManager
 from django.contrib.auth.models import AbstractUser
 from django.core.validators import MaxValueValidator, MinValueValidator
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.db.models import Count, F, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
 from reviews.validators import validate_username
 
 
+def iter_by_key(queryset, field, key, chunk_size=1000):
+    """Читаем выборку частями по возрастанию field, без курсора на сервере.
+
+    За pgbouncer серверные курсоры выключены и iterator() получил бы всю
+    выборку в память клиента; key достает значение field из строки.
+    """
+    queryset = queryset.order_by(field)
+    rows = list(queryset[:chunk_size])
+    while rows:
+        yield from rows
+        rows = list(queryset.filter(
+            **{f'{field}__gt': key(rows[-1])}
+        )[:chunk_size])
+
+
 class UserManager(BaseUserManager):
     def create_user(self, email, password=None, last_login=None, **kwargs):
         user = self.model(email=email, **kwargs)
@@ -107,6 +127,44 @@ class Genre(models.Model):
         return self.name
 
 
+class TitleQuerySet(models.QuerySet):
+    def change_rating(self, title_id, score, count=0):
+        """Сдвигаем сохраненные сумму и количество оценок произведения."""
+        return self.filter(pk=title_id).update(
+            rating_sum=F('rating_sum') + score,
+            rating_count=F('rating_count') + count,
+        )
+
+    def _actual_rating(self):
+        reviews = Review.objects.filter(
+            title=OuterRef('pk')
+        ).order_by().values('title')
+        return {
+            'rating_sum': Coalesce(Subquery(
+                reviews.annotate(total=Sum('score')).values('total')
+            ), 0),
+            'rating_count': Coalesce(Subquery(
+                reviews.annotate(total=Count('pk')).values('total')
+            ), 0),
+        }
+
+    def with_actual_rating(self):
+        """Добавляем сумму и количество оценок, посчитанные по отзывам."""
+        actual = self._actual_rating()
+        return self.annotate(actual_sum=actual['rating_sum'],
+                             actual_count=actual['rating_count'])
+
+    def rating_drift(self):
+        """Произведения, у которых сохраненный рейтинг разошелся с отзывами."""
+        return self.with_actual_rating().exclude(
+            rating_sum=F('actual_sum'), rating_count=F('actual_count')
+        )
+
+    def recalculate_rating(self):
+        """Пересчитываем рейтинг всех произведений одним UPDATE."""
+        return self.update(**self._actual_rating())
+
+
 class Title(models.Model):
     name = models.CharField(max_length=256)
     category = models.ForeignKey(
@@ -115,10 +173,12 @@ class Title(models.Model):
         on_delete=models.SET_NULL,
         blank=True,
         null=True,
+        db_index=False,
     )
     genre = models.ManyToManyField(
         Genre,
         related_name='titles',
+        through='GenreTitle',
     )
     year = models.IntegerField(
         blank=False,
@@ -127,16 +187,63 @@ class Title(models.Model):
     description = models.TextField(
         blank=True,
         null=True,)
+    rating_sum = models.PositiveIntegerField(
+        'сумма оценок',
+        default=0,
+    )
+    rating_count = models.PositiveIntegerField(
+        'количество оценок',
+        default=0,
+    )
+
+    objects = TitleQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['year'], name='title_year_idx'),
+            models.Index(
+                fields=['category', 'year'],
+                name='title_category_year_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.name
 
+    @property
+    def rating(self):
+        if not self.rating_count:
+            return None
+        return self.rating_sum / self.rating_count
+
+
+class GenreTitle(models.Model):
+    # Таблицу раньше создавал ManyToManyField: миграции Django 3.2 дали
+    # ей id типа AutoField. Миграция 0010 расширяет его до BigAutoField,
+    # как у остальных моделей приложения.
+    id = models.BigAutoField(primary_key=True)
+    title = models.ForeignKey(
+        Title, on_delete=models.CASCADE, db_index=False)
+    genre = models.ForeignKey(
+        Genre, on_delete=models.CASCADE, db_index=False)
+
+    class Meta:
+        db_table = 'reviews_title_genre'
+        unique_together = ('title', 'genre')
+        indexes = [
+            models.Index(
+                fields=['genre', 'title'],
+                name='genre_title_genre_idx'
+            ),
+        ]
+
 
 class Review(models.Model):
     author = models.ForeignKey(
         User, on_delete=models.CASCADE, related_name='reviews')
     title = models.ForeignKey(
-        Title, on_delete=models.CASCADE, related_name='reviews')
+        Title, on_delete=models.CASCADE, related_name='reviews',
+        db_index=False)
     text = models.TextField()
     pub_date = models.DateTimeField(
         'Дата добавления', auto_now_add=True, db_index=True)
@@ -152,13 +259,140 @@ class Review(models.Model):
                 name='unique_review'
             ),
         ]
+        indexes = [
+            models.Index(
+                fields=['title', 'pub_date', 'id'],
+                name='review_title_pub_date_idx'
+            ),
+        ]
+
+
+SCORES = range(1, 11)
+
+
+class TitleStatsQuerySet(models.QuerySet):
+    def rebuild(self, title_ids=None):
+        """Пересчитываем гистограммы оценок по отзывам."""
+        reviews = Review.objects.order_by().values('title_id')
+        stats = self.all()
+        if title_ids is not None:
+            reviews = reviews.filter(title_id__in=title_ids)
+            stats = stats.filter(title_id__in=title_ids)
+        stats.delete()
+        rows = reviews.annotate(**{
+            f'score_{score}': Count('pk', filter=Q(score=score))
+            for score in SCORES
+        })
+        return len(self.bulk_create((
+            TitleStats(**row) for row in iter_by_key(
+                rows, 'title_id', itemgetter('title_id')
+            )
+        ), batch_size=1000))
+
+    def move_score(self, title_id, old=None, new=None):
+        """Переносим оценку между столбцами гистограммы произведения.
+
+        Вызывается после записи отзыва: если строки еще нет, она
+        строится по отзывам и уже учитывает изменение.
+        """
+        if old == new:
+            return
+        changes = {}
+        if old is not None:
+            changes[f'score_{old}'] = F(f'score_{old}') - 1
+        if new is not None:
+            changes[f'score_{new}'] = F(f'score_{new}') + 1
+        if self.filter(title_id=title_id).update(**changes):
+            return
+        try:
+            with transaction.atomic():
+                self.rebuild([title_id])
+        except IntegrityError:
+            # Строку создал параллельный запрос без нашего изменения.
+            self.filter(title_id=title_id).update(**changes)
+
+
+class TitleStats(models.Model):
+    """Гистограмма оценок произведения, обновляется вместе с отзывами."""
+    title = models.OneToOneField(
+        Title,
+        primary_key=True,
+        on_delete=models.CASCADE,
+        related_name='stats',
+    )
+    score_1 = models.PositiveIntegerField(default=0)
+    score_2 = models.PositiveIntegerField(default=0)
+    score_3 = models.PositiveIntegerField(default=0)
+    score_4 = models.PositiveIntegerField(default=0)
+    score_5 = models.PositiveIntegerField(default=0)
+    score_6 = models.PositiveIntegerField(default=0)
+    score_7 = models.PositiveIntegerField(default=0)
+    score_8 = models.PositiveIntegerField(default=0)
+    score_9 = models.PositiveIntegerField(default=0)
+    score_10 = models.PositiveIntegerField(default=0)
+
+    objects = TitleStatsQuerySet.as_manager()
 
 
 class Comment(models.Model):
     author = models.ForeignKey(
         User, on_delete=models.CASCADE, related_name='comments')
     reviews = models.ForeignKey(
-        Review, on_delete=models.CASCADE, related_name='comments')
+        Review, on_delete=models.CASCADE, related_name='comments',
+        db_index=False)
     text = models.TextField()
     pub_date = models.DateTimeField(
         'Дата добавления', auto_now_add=True, db_index=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['reviews', 'pub_date', 'id'],
+                name='comment_review_pub_date_idx'
+            ),
+        ]
+
+
+class OutgoingEmail(models.Model):
+    """Письмо в очереди на отправку; отправляет команда send_emails.
+
+    Текст с кодом подтверждения стирается, как только письмо отправлено
+    или исчерпало попытки.
+    """
+    PENDING = 'pending'
+    SENT = 'sent'
+    FAILED = 'failed'
+
+    STATUSES = (
+        (PENDING, 'В очереди'),
+        (SENT, 'Отправлено'),
+        (FAILED, 'Ошибка'),
+    )
+    subject = models.CharField('тема', max_length=255)
+    body = models.TextField('текст')
+    from_email = models.CharField('отправитель', max_length=254)
+    recipient = models.EmailField('получатель', max_length=254)
+    status = models.CharField(
+        'статус',
+        max_length=10,
+        choices=STATUSES,
+        default=PENDING,
+    )
+    attempts = models.PositiveSmallIntegerField('попыток', default=0)
+    next_attempt = models.DateTimeField(
+        'следующая попытка', default=timezone.now
+    )
+    error = models.TextField('последняя ошибка', blank=True)
+    created = models.DateTimeField('создано', auto_now_add=True)
+    sent = models.DateTimeField('отправлено', blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['status', 'id'],
+                name='outgoing_email_status_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.recipient}: {self.subject}'
@@ -0,0 +1,100 @@
+import random
+from itertools import islice
+
+from reviews.models import (Category, Comment, Genre, GenreTitle, Review,
+                            Title, TitleStats, User)
+from reviews.signals import bulk_changed
+
+WORDS = (
+    'война', 'мир', 'звезда', 'ночь', 'город', 'море', 'тайна', 'песня',
+    'дорога', 'время', 'огонь', 'сад', 'зима', 'лето', 'остров', 'тень',
+)
+
+
+def batched(objects, batch_size):
+    objects = iter(objects)
+    while True:
+        batch = list(islice(objects, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+def seed_catalog(titles=1000, categories=10, genres=20, genres_per_title=2,
+                 batch_size=1000, seed=0):
+    """Наполняем БД синтетическим каталогом через bulk_create."""
+    rng = random.Random(seed)
+    prefix = f'seed-{rng.getrandbits(32):08x}'
+    Category.objects.bulk_create(
+        Category(name=f'Категория {number}', slug=f'{prefix}-c{number}')
+        for number in range(categories)
+    )
+    Genre.objects.bulk_create(
+        Genre(name=f'Жанр {number}', slug=f'{prefix}-g{number}')
+        for number in range(genres)
+    )
+    # SQLite не возвращает id из bulk_create, читаем их по slug.
+    category_ids = list(Category.objects.filter(
+        slug__startswith=f'{prefix}-'
+    ).values_list('pk', flat=True))
+    genre_ids = list(Genre.objects.filter(
+        slug__startswith=f'{prefix}-'
+    ).values_list('pk', flat=True))
+    for batch in batched((
+        Title(name=' '.join(rng.sample(WORDS, 3)),
+              year=rng.randint(1900, 2022),
+              category_id=rng.choice(category_ids))
+        for _ in range(titles)
+    ), batch_size):
+        Title.objects.bulk_create(batch)
+    title_ids = Title.objects.filter(
+        category_id__in=category_ids
+    ).values_list('pk', flat=True)
+    for batch in batched((
+        GenreTitle(title_id=title_id, genre_id=genre_id)
+        for title_id in title_ids.iterator()
+        for genre_id in rng.sample(genre_ids, genres_per_title)
+    ), batch_size):
+        GenreTitle.objects.bulk_create(batch)
+    bulk_changed.send(sender=seed_catalog)
+    return title_ids
+
+
+def seed_reviews(title_ids, reviews_per_title=5, comments_per_review=2,
+                 users=None, batch_size=1000, seed=0):
+    """Добавляем произведениям отзывы и комментарии от новых авторов.
+
+    Авторов `users`, но не меньше reviews_per_title: у произведения
+    не больше одного отзыва от автора.
+    """
+    rng = random.Random(seed)
+    prefix = f'seed-{rng.getrandbits(32):08x}'
+    User.objects.bulk_create(
+        User(username=f'{prefix}-u{number}',
+             email=f'{prefix}-u{number}@yamdb.fake')
+        for number in range(max(reviews_per_title, users or 0, 1))
+    )
+    user_ids = list(User.objects.filter(
+        username__startswith=f'{prefix}-'
+    ).values_list('pk', flat=True))
+    text = ' '.join(WORDS)
+    for batch in batched((
+        Review(title_id=title_id, author_id=author_id, text=text,
+               score=rng.randint(1, 10))
+        for title_id in title_ids
+        for author_id in rng.sample(user_ids, reviews_per_title)
+    ), batch_size):
+        Review.objects.bulk_create(batch)
+    review_ids = Review.objects.filter(
+        author_id__in=user_ids
+    ).values_list('pk', flat=True)
+    for batch in batched((
+        Comment(reviews_id=review_id, author_id=rng.choice(user_ids),
+                text=text)
+        for review_id in review_ids.iterator()
+        for _ in range(comments_per_review)
+    ), batch_size):
+        Comment.objects.bulk_create(batch)
+    Title.objects.filter(pk__in=title_ids).recalculate_rating()
+    TitleStats.objects.rebuild(title_ids)
+    bulk_changed.send(sender=seed_reviews)
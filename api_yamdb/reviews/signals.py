@@ -0,0 +1,49 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import Signal, receiver
+from reviews.models import Review, Title, TitleStats
+
+# Данные изменены массово, в обход сигналов моделей: bulk_create,
+# QuerySet.update(). Отправляют load_data, recalculate_rating и seed.
+bulk_changed = Signal()
+
+
+def add_score(title_id, score):
+    Title.objects.change_rating(title_id, score, 1)
+    TitleStats.objects.move_score(title_id, new=score)
+
+
+def remove_score(title_id, score):
+    Title.objects.change_rating(title_id, -score, -1)
+    TitleStats.objects.move_score(title_id, old=score)
+
+
+@receiver(pre_save, sender=Review)
+def remember_score(sender, instance, **kwargs):
+    instance._saved_score = None
+    if instance.pk is not None:
+        instance._saved_score = Review.objects.filter(
+            pk=instance.pk
+        ).values_list('title_id', 'score').first()
+
+
+@receiver(post_save, sender=Review)
+def update_rating(sender, instance, created, **kwargs):
+    # Рейтинг и гистограмма ведутся здесь, а не во вьюсете: так их
+    # обновляют и админка, и shell.
+    saved = getattr(instance, '_saved_score', None)
+    if saved is None:
+        add_score(instance.title_id, instance.score)
+        return
+    title_id, score = saved
+    if title_id != instance.title_id:
+        remove_score(title_id, score)
+        add_score(instance.title_id, instance.score)
+    elif score != instance.score:
+        Title.objects.change_rating(title_id, instance.score - score)
+        TitleStats.objects.move_score(title_id, score, instance.score)
+
+
+@receiver(post_delete, sender=Review)
+def remove_rating(sender, instance, **kwargs):
+    # Срабатывает и при каскадном удалении отзывов вместе с автором.
+    remove_score(instance.title_id, instance.score)
@@ -0,0 +1,96 @@
+import fcntl
+import pickle
+import time
+from urllib.parse import urlparse
+
+
+class FakeRedis:
+    """Локальная замена redis.Redis с командами, нужными хранилищам."""
+
+    def __init__(self):
+        self.data = {}
+
+    @classmethod
+    def from_url(cls, url):
+        return cls()
+
+    def _alive(self, key):
+        value, expires = self.data.get(key, (None, None))
+        if expires is not None and expires <= time.monotonic():
+            del self.data[key]
+            return None
+        return value
+
+    def get(self, key):
+        return self._alive(key)
+
+    def mget(self, keys):
+        return [self._alive(key) for key in keys]
+
+    def set(self, key, value, ex=None, nx=False):
+        if nx and self._alive(key) is not None:
+            return None
+        expires = None if ex is None else time.monotonic() + ex
+        self.data[key] = (value, expires)
+        return True
+
+    def incr(self, key):
+        value = int(self._alive(key) or 0) + 1
+        expires = self.data.get(key, (None, None))[1]
+        self.data[key] = (str(value).encode(), expires)
+        return value
+
+    def expire(self, key, seconds):
+        if self._alive(key) is None:
+            return False
+        self.data[key] = (self.data[key][0], time.monotonic() + seconds)
+        return True
+
+    def flushdb(self):
+        self.data.clear()
+        return True
+
+
+class BrokenRedis(FakeRedis):
+    """Redis, который не отвечает: каждая команда - ConnectionError."""
+
+    def _broken(self, *args, **kwargs):
+        raise ConnectionError('Redis недоступен')
+
+    get = mget = set = incr = expire = flushdb = _broken
+
+
+class FileRedis(FakeRedis):
+    """FakeRedis с данными в файле из URL: общий для нескольких процессов.
+
+    Каждая команда читает и записывает файл под блокировкой.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    @classmethod
+    def from_url(cls, url):
+        return cls(urlparse(url).path)
+
+    def _locked(name):
+        def command(self, *args, **kwargs):
+            with open(f'{self.path}.lock', 'w') as lock:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+                try:
+                    with open(self.path, 'rb') as stored:
+                        self.data = pickle.load(stored)
+                except FileNotFoundError:
+                    self.data = {}
+                result = getattr(FakeRedis, name)(self, *args, **kwargs)
+                with open(self.path, 'wb') as stored:
+                    pickle.dump(self.data, stored)
+            return result
+        return command
+
+    get = _locked('get')
+    mget = _locked('mget')
+    set = _locked('set')
+    incr = _locked('incr')
+    expire = _locked('expire')
+    flushdb = _locked('flushdb')
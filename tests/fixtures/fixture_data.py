@@ -0,0 +1,147 @@
+import csv
+import itertools
+
+import pytest
+from api.authentication import auth_cache, get_access_token
+from api.cache import response_cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from reviews.models import Category, Comment, Genre, Review, Title
+
+_sequence = itertools.count()
+
+
+@pytest.fixture
+def create_comments(django_user_model):
+    def make(review, count=1):
+        author = review.author
+        return [
+            Comment.objects.create(author=author, reviews=review,
+                                   text='Комментарий')
+            for _ in range(count)
+        ]
+
+    return make
+
+
+@pytest.fixture
+def create_reviews(django_user_model, create_comments):
+    def make(title, count=1, comments=0):
+        reviews = []
+        for _ in range(count):
+            number = next(_sequence)
+            author = django_user_model.objects.create(
+                username=f'user{number}', email=f'user{number}@yamdb.fake'
+            )
+            review = Review.objects.create(
+                author=author, title=title, text='Отзыв', score=number % 10 + 1
+            )
+            create_comments(review, comments)
+            reviews.append(review)
+        return reviews
+
+    return make
+
+
+@pytest.fixture
+def create_titles(create_reviews):
+    def make(count=1, reviews=0, comments=0):
+        titles = []
+        for _ in range(count):
+            number = next(_sequence)
+            category = Category.objects.create(
+                name=f'Категория {number}', slug=f'category-{number}'
+            )
+            title = Title.objects.create(
+                name=f'Произведение {number}', year=2000, category=category
+            )
+            title.genre.set([
+                Genre.objects.create(
+                    name=f'Жанр {number}-{index}',
+                    slug=f'genre-{number}-{index}'
+                )
+                for index in range(2)
+            ])
+            create_reviews(title, reviews, comments)
+            titles.append(title)
+        return titles
+
+    return make
+
+
+@pytest.fixture
+def queries_per_page(client):
+    """Считаем SQL-запросы, выполненные при GET-запросе к эндпоинту."""
+    def count(url):
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url)
+        assert response.status_code == 200, (
+            f'Проверьте, что GET-запрос к `{url}` возвращает статус 200'
+        )
+        return len(context)
+
+    return count
+
+
+@pytest.fixture(autouse=True)
+def clear_response_cache():
+    response_cache.backend.clear()
+    auth_cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def send_emails_explicitly(settings):
+    """Письма из очереди отправляет сам тест, а не фоновый поток."""
+    settings.EMAIL_OUTBOX = dict(settings.EMAIL_OUTBOX, THREAD=False)
+
+
+@pytest.fixture
+def csv_data(tmp_path):
+    """Каталог с небольшим набором CSV-файлов в формате load_data."""
+    files = {
+        'users.csv': (
+            ('id', 'username', 'email', 'role', 'bio',
+             'first_name', 'last_name'),
+            [(pk, f'csv{pk}', f'csv{pk}@yamdb.fake', 'user', '', '', '')
+             for pk in range(1, 4)],
+        ),
+        'genre.csv': (('id', 'name', 'slug'), [(1, 'Драма', 'drama')]),
+        'category.csv': (('id', 'name', 'slug'), [(1, 'Фильм', 'movie')]),
+        'titles.csv': (
+            ('id', 'name', 'year', 'category'),
+            [(1, 'Первое', 1990, 1), (2, 'Второе', 2000, 1)],
+        ),
+        'genre_title.csv': (
+            ('id', 'title_id', 'genre_id'), [(1, 1, 1), (2, 2, 1)],
+        ),
+        'review.csv': (
+            ('id', 'title_id', 'text', 'author', 'score', 'pub_date'),
+            [(pk, 1, 'Отзыв', pk, pk * 2, '2019-09-24T21:08:21.567Z')
+             for pk in range(1, 4)],
+        ),
+        'comments.csv': (
+            ('id', 'review_id', 'text', 'author', 'pub_date'),
+            [(pk, 1, 'Комментарий', pk, '2019-09-24T21:08:21.567Z')
+             for pk in range(1, 4)],
+        ),
+    }
+    for name, (header, rows) in files.items():
+        with open(tmp_path / name, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(header)
+            writer.writerows(rows)
+    return tmp_path
+
+
+@pytest.fixture
+def admin_api_client(django_user_model):
+    """Клиент с JWT-токеном администратора."""
+    user = django_user_model.objects.create(
+        username='yamdb-admin', email='admin@yamdb.fake', role='admin'
+    )
+    client = APIClient()
+    client.credentials(
+        HTTP_AUTHORIZATION=f'Bearer {get_access_token(user)}'
+    )
+    return client
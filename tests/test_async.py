@@ -0,0 +1,72 @@
+import asyncio
+
+import pytest
+from api.metrics import MetricsMiddleware
+from api.views import CommentsViewSet, TitleViewSet
+from asgiref.sync import async_to_sync
+from django.db import connection
+from django.test import AsyncRequestFactory
+from django.test.utils import CaptureQueriesContext
+
+
+@pytest.fixture
+def async_views(settings):
+    settings.ASYNC_VIEWS = True
+
+
+@pytest.mark.django_db
+class TestAsyncViews:
+    """При ASYNC_VIEWS попадание в кэш отдается без потока и БД."""
+
+    def get(self, view, path, **headers):
+        # В Django 3.2 extra фабрики ASGI - это имена заголовков.
+        request = AsyncRequestFactory().get(path, **headers)
+        return async_to_sync(view)(request)
+
+    def test_cache_hit_without_queries(self, async_views, create_titles):
+        create_titles(2)
+        view = TitleViewSet.as_view({'get': 'list'})
+        assert asyncio.iscoroutinefunction(view)
+        miss = self.get(view, '/api/v1/titles/')
+        assert miss['X-Cache'] == 'MISS'
+        with CaptureQueriesContext(connection) as context:
+            hit = self.get(view, '/api/v1/titles/')
+        assert hit['X-Cache'] == 'HIT' and not context, (
+            'Проверьте, что ответ из кэша не обращается к БД'
+        )
+        assert hit.content == miss.render().content
+        assert hit['ETag'] == miss['ETag']
+        not_modified = self.get(view, '/api/v1/titles/',
+                                **{'if-none-match': miss['ETag']})
+        assert not_modified.status_code == 304
+
+    def test_comments(self, async_views, create_titles, create_comments):
+        title, = create_titles(1, reviews=1, comments=1)
+        review = title.reviews.get()
+        view = CommentsViewSet.as_view({'get': 'list'})
+        path = f'/api/v1/titles/{title.pk}/reviews/{review.pk}/comments/'
+        kwargs = {'titles_id': str(title.pk), 'review_id': str(review.pk)}
+        request = AsyncRequestFactory().get(path)
+        assert async_to_sync(view)(request, **kwargs)['X-Cache'] == 'MISS'
+        create_comments(review, 2)
+        response = async_to_sync(view)(request, **kwargs)
+        assert response['X-Cache'] == 'MISS', (
+            'Проверьте, что новый комментарий сбрасывает кэш'
+        )
+        assert response.data['count'] == 3
+
+    def test_sync_by_default(self):
+        view = TitleViewSet.as_view({'get': 'list'})
+        assert not asyncio.iscoroutinefunction(view)
+
+
+class TestAsyncMiddleware:
+
+    def test_async_capable(self):
+        async def get_response(request):
+            return None
+
+        assert asyncio.iscoroutinefunction(MetricsMiddleware(get_response))
+        assert not asyncio.iscoroutinefunction(
+            MetricsMiddleware(lambda request: None)
+        )
@@ -0,0 +1,100 @@
+import pytest
+from api.authentication import auth_cache, get_access_token
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+
+@pytest.fixture
+def shared_auth_cache(monkeypatch):
+    # Метки изменения прав видны всем процессам, как в Redis.
+    monkeypatch.setattr(auth_cache, 'shared', True)
+
+
+@pytest.mark.django_db
+class TestStatelessAuthentication:
+    """GET-запросы с JWT не должны читать пользователя из БД."""
+
+    def get_client(self, user):
+        client = APIClient()
+        client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {get_access_token(user)}'
+        )
+        return client
+
+    def user_queries(self, client, url, status=200):
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url)
+        assert response.status_code == status, (
+            f'Проверьте, что GET-запрос к `{url}` возвращает статус {status}'
+        )
+        return [query['sql'] for query in context
+                if 'reviews_user' in query['sql']]
+
+    def test_get_without_user_query(self, django_user_model,
+                                    shared_auth_cache):
+        user = django_user_model.objects.create(
+            username='reader', email='reader@yamdb.fake'
+        )
+        client = self.get_client(user)
+        assert not self.user_queries(client, '/api/v1/titles/'), (
+            'Проверьте, что GET-запрос с актуальным токеном не выполняет '
+            'запрос к таблице пользователей'
+        )
+
+    def test_role_change_is_respected(self, django_user_model):
+        user = django_user_model.objects.create(
+            username='staff', email='staff@yamdb.fake', role='admin'
+        )
+        client = self.get_client(user)
+        self.user_queries(client, '/api/v1/users/')
+        user.role = 'user'
+        user.save()
+        queries = self.user_queries(client, '/api/v1/users/', status=403)
+        assert queries, (
+            'Проверьте, что после смены роли токен, выпущенный раньше, '
+            'проверяется по БД'
+        )
+
+    def test_unrelated_save_keeps_token(self, django_user_model,
+                                        shared_auth_cache):
+        user = django_user_model.objects.create(
+            username='writer', email='writer@yamdb.fake'
+        )
+        client = self.get_client(user)
+        user.bio = 'Новая биография'
+        user.save()
+        assert not self.user_queries(client, '/api/v1/titles/'), (
+            'Проверьте, что изменение профиля без смены прав не делает '
+            'токен устаревшим'
+        )
+
+    def test_local_cache_reads_user(self, django_user_model):
+        user = django_user_model.objects.create(
+            username='local', email='local@yamdb.fake'
+        )
+        assert self.user_queries(self.get_client(user), '/api/v1/titles/'), (
+            'Проверьте, что с хранилищем в памяти процесса пользователь '
+            'читается из БД'
+        )
+
+    def test_admin_checked_in_db(self, django_user_model, shared_auth_cache):
+        user = django_user_model.objects.create(
+            username='demoted', email='demoted@yamdb.fake', role='admin'
+        )
+        client = self.get_client(user)
+        self.user_queries(client, '/api/v1/users/')
+        # update() не вызывает сигналы: метки об изменении прав нет.
+        django_user_model.objects.filter(pk=user.pk).update(role='user')
+        self.user_queries(client, '/api/v1/users/', status=403)
+        django_user_model.objects.filter(pk=user.pk).delete()
+        self.user_queries(client, '/api/v1/users/', status=401)
+
+    def test_me_returns_profile(self, django_user_model):
+        user = django_user_model.objects.create(
+            username='profile', email='profile@yamdb.fake', bio='Биография'
+        )
+        response = self.get_client(user).get('/api/v1/users/me/')
+        assert response.json()['bio'] == 'Биография', (
+            'Проверьте, что `/api/v1/users/me/` отдает профиль из БД'
+        )
@@ -0,0 +1,31 @@
+import json
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from reviews.models import Title, User
+
+
+@pytest.mark.django_db
+class TestBenchmarkApi:
+
+    def test_report(self):
+        out = StringIO()
+        call_command('benchmark_api', titles=3, users=2,
+                     reviews_per_title=2, comments_per_review=1,
+                     requests=3, warmup=1, stdout=out)
+        report = json.loads(out.getvalue())
+        assert set(report['scenarios']) == {
+            'titles', 'titles_filtered', 'title', 'reviews', 'comments',
+            'signup', 'token',
+        }
+        for name, result in report['scenarios'].items():
+            assert result['requests'] == 3
+            assert result['errors'] == 0, (
+                f'Проверьте, что запросы сценария {name} успешны'
+            )
+            assert 0 < result['p50_ms'] <= result['p99_ms']
+            assert result['queries_per_request'] >= 0
+        assert not Title.objects.exists() and not User.objects.exists(), (
+            'Проверьте, что данные прогона откатываются'
+        )
@@ -0,0 +1,215 @@
+import time
+from io import StringIO
+from types import SimpleNamespace
+
+import pytest
+from api import authentication
+from api import cache as cache_module
+from api import middleware, throttling
+from api.cache import (LocMemBackend, RedisBackend, ResponseCache,
+                       response_cache)
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+@pytest.mark.django_db
+class TestResponseCache:
+
+    def test_hit_after_miss(self, client, create_titles):
+        create_titles(2)
+        assert client.get('/api/v1/titles/')['X-Cache'] == 'MISS'
+        response = client.get('/api/v1/titles/')
+        assert response['X-Cache'] == 'HIT', (
+            'Проверьте, что повторный GET-запрос отдается из кэша'
+        )
+        assert response.json()['count'] == 2
+        assert response_cache.stats() == {'hits': 1, 'misses': 1}
+
+    def test_query_string_in_key(self, client, create_titles):
+        create_titles(2)
+        client.get('/api/v1/titles/')
+        response = client.get('/api/v1/titles/?year=1999')
+        assert response['X-Cache'] == 'MISS'
+        assert response.json()['count'] == 0
+
+    def test_review_invalidates_title(self, client, create_titles,
+                                      create_reviews):
+        title, other = create_titles(2)
+        url = f'/api/v1/titles/{title.pk}/'
+        other_url = f'/api/v1/titles/{other.pk}/'
+        client.get(url)
+        client.get(other_url)
+        create_reviews(title, 1)
+        response = client.get(url)
+        assert response['X-Cache'] == 'MISS', (
+            'Проверьте, что новый отзыв сбрасывает кэш произведения'
+        )
+        assert response.json()['rating'] is not None
+        assert client.get(other_url)['X-Cache'] == 'HIT', (
+            'Проверьте, что отзыв не сбрасывает кэш других произведений'
+        )
+
+    @pytest.mark.parametrize('deleted', ['review', 'title'])
+    def test_deleted_review_comments(self, client, create_titles, deleted):
+        title, = create_titles(1, reviews=1)
+        review = title.reviews.get()
+        url = f'/api/v1/titles/{title.pk}/reviews/{review.pk}/comments/'
+        assert client.get(url).status_code == 200
+        assert client.get(url)['X-Cache'] == 'HIT'
+        (review if deleted == 'review' else title).delete()
+        assert client.get(url).status_code == 404, (
+            'Проверьте, что удаление отзыва без комментариев или его '
+            'произведения сбрасывает кэш списка комментариев'
+        )
+
+    def test_category_invalidates_titles(self, client, create_titles):
+        title, = create_titles(1)
+        url = f'/api/v1/titles/{title.pk}/'
+        client.get(url)
+        client.get('/api/v1/categories/')
+        title.category.name = 'Новое имя'
+        title.category.save()
+        assert client.get('/api/v1/categories/')['X-Cache'] == 'MISS'
+        response = client.get(url)
+        assert response['X-Cache'] == 'MISS'
+        assert response.json()['category']['name'] == 'Новое имя'
+
+    def test_bulk_changes_invalidate(self, client, create_titles):
+        title, = create_titles(1)
+        url = f'/api/v1/titles/{title.pk}/'
+        client.get(url)
+        call_command('recalculate_rating', stdout=StringIO())
+        assert client.get(url)['X-Cache'] == 'MISS', (
+            'Проверьте, что массовый пересчет сбрасывает кэш ответов'
+        )
+
+
+class TestLocMemBackend:
+
+    def test_lost_version_starts_fresh(self, monkeypatch):
+        cache = ResponseCache(
+            LocMemBackend('culled', {'MAX_ENTRIES': 3}), timeout=60,
+            version_timeout=600,
+        )
+        cache.backend.clear()
+        cache.bump(['titles'])
+        versions = cache.versions(['titles'])
+        now = time.time() + 10
+        monkeypatch.setattr(cache_module, 'time',
+                            SimpleNamespace(time=lambda: now))
+        for number in range(20):
+            cache.set(f'response:{number}', {'results': []})
+        cache.backend.cache.delete('version:titles')
+        assert cache.versions(['titles']) == [int(now * 1000000)], (
+            'Проверьте, что вытесненная версия начинается с текущего '
+            'времени, а не с прежнего значения'
+        )
+        assert cache.last_modified(versions) < int(now)
+
+
+@pytest.mark.django_db
+class TestConditionalRequests:
+
+    def test_etag_not_modified(self, client, create_titles):
+        create_titles(2)
+        etag = client.get('/api/v1/titles/')['ETag']
+        with CaptureQueriesContext(connection) as context:
+            response = client.get('/api/v1/titles/', HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304, (
+            'Проверьте, что запрос с актуальным ETag получает 304'
+        )
+        assert not context, 'Проверьте, что ответ 304 не обращается к БД'
+
+    def test_review_changes_etag(self, client, create_titles,
+                                 create_reviews):
+        title, = create_titles(1)
+        url = f'/api/v1/titles/{title.pk}/reviews/'
+        etag = client.get(url)['ETag']
+        create_reviews(title, 1)
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200, (
+            'Проверьте, что новый отзыв меняет ETag списка отзывов'
+        )
+        assert len(response.json()['results']) == 1
+
+    def test_lost_versions_change_etag(self, client, create_titles,
+                                       monkeypatch):
+        create_titles(1)
+        response = client.get('/api/v1/categories/')
+        # Хранилище перезапустилось и потеряло версии.
+        response_cache.backend.clear()
+        now = time.time() + 10
+        monkeypatch.setattr(cache_module, 'time',
+                            SimpleNamespace(time=lambda: now))
+        assert client.get(
+            '/api/v1/categories/', HTTP_IF_NONE_MATCH=response['ETag'],
+        ).status_code == 200, (
+            'Проверьте, что после потери версий старый ETag не дает 304'
+        )
+        assert client.get(
+            '/api/v1/categories/',
+            HTTP_IF_MODIFIED_SINCE=response['Last-Modified'],
+        ).status_code == 200
+
+    def test_if_modified_since(self, client, create_titles):
+        create_titles(1)
+        response = client.get('/api/v1/categories/')
+        assert client.get(
+            '/api/v1/categories/',
+            HTTP_IF_MODIFIED_SINCE=response['Last-Modified'],
+        ).status_code == 304
+
+
+@pytest.mark.django_db
+class TestRedisBackend:
+
+    def test_stand_in(self):
+        cache = ResponseCache(RedisBackend(
+            'redis://localhost:6379/0',
+            {'CLIENT_CLASS': 'tests.fixtures.fake_redis.FakeRedis'}
+        ), timeout=60, version_timeout=600)
+        cache.backend.set('response:x', {'results': [1]}, 60)
+        assert cache.get('response:x') == {'results': [1]}
+        assert cache.get('response:y') is None
+        before = cache.versions(['titles'])
+        cache.invalidate('titles')
+        assert cache.versions(['titles']) != before
+        assert cache.stats() == {'hits': 1, 'misses': 1}
+
+    def test_versions_expire(self):
+        cache = ResponseCache(RedisBackend(
+            'redis://localhost:6379/0',
+            {'CLIENT_CLASS': 'tests.fixtures.fake_redis.FakeRedis'}
+        ), timeout=60, version_timeout=600)
+        cache.versions(['titles:1'])
+        cache.invalidate('titles:2')
+        data = cache.backend.client.data
+        assert all(data[f'version:titles:{pk}'][1] is not None
+                   for pk in (1, 2)), (
+            'Проверьте, что у версий объектов есть срок жизни'
+        )
+
+    def test_errors_fail_open(self, client, admin_api_client,
+                              create_titles, monkeypatch):
+        broken = RedisBackend(
+            'redis://localhost:6379/0',
+            {'CLIENT_CLASS': 'tests.fixtures.fake_redis.BrokenRedis'}
+        )
+        monkeypatch.setattr(response_cache, 'backend', broken)
+        for module in (authentication, middleware, throttling):
+            monkeypatch.setattr(module, 'auth_cache', broken)
+        create_titles(1)
+        for _ in range(2):
+            response = client.get('/api/v1/categories/')
+            assert response.status_code == 200, (
+                'Проверьте, что без Redis ответ отдается без кэша'
+            )
+            assert response['X-Cache'] == 'MISS'
+        assert admin_api_client.get('/api/v1/titles/').status_code == 200
+        assert admin_api_client.post('/api/v1/categories/', {
+            'name': 'Новая', 'slug': 'new',
+        }).status_code == 201
+        assert client.post('/api/v1/auth/signup/', {
+            'username': 'offline', 'email': 'offline@yamdb.fake',
+        }).status_code == 200
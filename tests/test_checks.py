@@ -0,0 +1,20 @@
+from api.checks import check_shared_caches
+
+
+class TestSharedCaches:
+
+    def test_local_backend_rejected(self, settings):
+        settings.SHARED_CACHE_REQUIRED = True
+        assert [error.id for error in check_shared_caches(None)] == [
+            'api.E001', 'api.E001'
+        ], 'Проверьте, что хранилище в памяти процесса не проходит проверку'
+
+    def test_shared_backend(self, settings):
+        settings.SHARED_CACHE_REQUIRED = True
+        for name in ('AUTH_CACHE', 'RESPONSE_CACHE'):
+            setattr(settings, name, dict(getattr(settings, name),
+                                         BACKEND='api.cache.RedisBackend'))
+        assert check_shared_caches(None) == []
+
+    def test_not_required(self, settings):
+        assert check_shared_caches(None) == []
@@ -0,0 +1,29 @@
+import pytest
+
+
+@pytest.mark.django_db
+class TestCommentsScope:
+
+    def test_comments_of_review_only(self, client, create_titles):
+        title, other = create_titles(2, reviews=1, comments=2)
+        review = title.reviews.get()
+        response = client.get(
+            f'/api/v1/titles/{title.pk}/reviews/{review.pk}/comments/'
+        )
+        assert response.status_code == 200
+        ids = {comment['id'] for comment in response.json()['results']}
+        assert ids == set(review.comments.values_list('id', flat=True)), (
+            'Проверьте, что выдаются только комментарии к отзыву из URL'
+        )
+        assert response.json()['count'] == 2
+
+    def test_review_of_other_title(self, client, create_titles):
+        title, other = create_titles(2, reviews=1, comments=1)
+        review = other.reviews.get()
+        response = client.get(
+            f'/api/v1/titles/{title.pk}/reviews/{review.pk}/comments/'
+        )
+        assert response.status_code == 404, (
+            'Проверьте, что для отзыва к другому произведению '
+            'возвращается статус 404'
+        )
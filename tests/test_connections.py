@@ -0,0 +1,43 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.core.signals import request_started
+from django.db import connection
+
+
+@pytest.mark.django_db(transaction=True)
+class TestConnections:
+
+    def test_health_check_closes_broken(self, monkeypatch):
+        closed = []
+        connection.ensure_connection()
+        monkeypatch.setitem(connection.settings_dict, 'CONN_HEALTH_CHECKS',
+                            True)
+        monkeypatch.setattr(connection, 'close', lambda: closed.append(1))
+        request_started.send(sender=self.__class__)
+        assert not closed, 'Проверьте, что рабочее соединение не закрывается'
+        monkeypatch.setattr(connection, 'is_usable', lambda: False)
+        request_started.send(sender=self.__class__)
+        assert closed, (
+            'Проверьте, что неотвечающее соединение закрывается до запроса'
+        )
+
+    def test_benchmark(self):
+        max_age = connection.settings_dict['CONN_MAX_AGE']
+        out = StringIO()
+        call_command('benchmark_connections', requests=3, stdout=out)
+        modes = [line.split(':')[0] for line in out.getvalue().splitlines()]
+        assert modes[-3:] == ['new', 'persistent', 'persistent+health']
+        assert connection.settings_dict['CONN_MAX_AGE'] == max_age, (
+            'Проверьте, что команда восстанавливает настройки соединения'
+        )
+
+    def test_benchmark_without_persistent(self, monkeypatch):
+        monkeypatch.setitem(connection.settings_dict, 'CONN_MAX_AGE', 0)
+        out = StringIO()
+        call_command('benchmark_connections', requests=1, stdout=out)
+        assert 'только режим new' in out.getvalue(), (
+            'Проверьте, что команда предупреждает, когда постоянные '
+            'соединения выключены'
+        )
@@ -0,0 +1,23 @@
+from io import StringIO
+
+import pytest
+from django.core.management import CommandError, call_command
+
+
+@pytest.mark.django_db
+class TestExplainFilters:
+
+    def test_seed(self):
+        out = StringIO()
+        try:
+            call_command('explain_filters', seed=5, stdout=out)
+        except CommandError as error:
+            # SQLite сканирует таблицы там, где PostgreSQL берет индекс.
+            assert 'Последовательное сканирование' in str(error)
+        plans = [line for line in out.getvalue().splitlines()
+                 if line.startswith('{')]
+        assert len(plans) == 15, (
+            'Проверьте, что команда выполняет EXPLAIN для всех сочетаний '
+            'фильтров, в том числе с name'
+        )
+        assert any("'name'" in line for line in plans)
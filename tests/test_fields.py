@@ -0,0 +1,67 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+@pytest.mark.django_db
+class TestSparseFields:
+    """Параметры fields и expand сокращают ответ и SQL-запросы."""
+
+    def get(self, client, url):
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url)
+        assert response.status_code == 200, (
+            f'Проверьте, что GET-запрос к `{url}` возвращает статус 200'
+        )
+        return response.json(), [query['sql'] for query in context]
+
+    def test_titles_list_fields(self, client, create_titles):
+        create_titles(2, reviews=1)
+        data, queries = self.get(client,
+                                 '/api/v1/titles/?fields=id,name,rating')
+        assert [list(title) for title in data['results']] == [
+            ['id', 'name', 'rating']
+        ] * 2, 'Проверьте, что список произведений отдает только fields'
+        assert len(queries) == 2, (
+            'Проверьте, что без поля genre жанры не запрашиваются'
+        )
+        assert not any('JOIN' in sql for sql in queries), (
+            'Проверьте, что без поля category категория не присоединяется'
+        )
+
+    def test_title_retrieve_fields(self, client, create_titles):
+        title, = create_titles(1)
+        data, queries = self.get(client,
+                                 f'/api/v1/titles/{title.pk}/?fields=name')
+        assert data == {'name': title.name}
+        assert len(queries) == 1
+        assert '"description"' not in queries[0], (
+            'Проверьте, что не запрошенные колонки не читаются из БД'
+        )
+
+    def test_expand_author(self, client, create_titles):
+        title, = create_titles(1, reviews=1, comments=1)
+        review = title.reviews.get()
+        url = f'/api/v1/titles/{title.pk}/reviews/'
+        expected = {'username': review.author.username,
+                    'first_name': '', 'last_name': ''}
+        for path in (url, f'{url}{review.pk}/',
+                     f'{url}{review.pk}/comments/'):
+            data, _ = self.get(client, f'{path}?fields=author&expand=author')
+            item = data['results'][0] if 'results' in data else data
+            assert item == {'author': expected}, (
+                f'Проверьте, что `{path}` раскрывает автора по expand=author'
+            )
+
+    def test_cursor_with_fields(self, client, create_titles):
+        title, = create_titles(1, reviews=3)
+        data, _ = self.get(
+            client, f'/api/v1/titles/{title.pk}/reviews/'
+                    f'?fields=text&pagination=cursor&page_size=2'
+        )
+        assert data['next'] and data['results'] == [{'text': 'Отзыв'}] * 2
+
+    def test_unknown_field(self, client):
+        response = client.get('/api/v1/titles/?fields=id,secret')
+        assert response.status_code == 400
+        assert 'fields' in response.json()
@@ -0,0 +1,38 @@
+import pytest
+
+
+@pytest.mark.django_db
+class TestTitleFull:
+    """`/titles/{id}/full/` отдает страницу произведения одним запросом."""
+
+    def test_fixed_queries(self, create_titles, create_reviews,
+                           queries_per_page):
+        title, = create_titles(1, reviews=1, comments=1)
+        url = f'/api/v1/titles/{title.pk}/full/'
+        few = queries_per_page(url)
+        create_reviews(title, 6, comments=5)
+        assert queries_per_page(url) == few == 5, (
+            f'Проверьте, что `{url}` выполняет фиксированное число запросов'
+        )
+
+    def test_limits(self, client, create_titles):
+        title, = create_titles(1, reviews=4, comments=6)
+        data = client.get(
+            f'/api/v1/titles/{title.pk}/full/?page_size=3&comments=2'
+        ).json()
+        assert data['name'] == title.name
+        reviews = data['reviews']
+        assert reviews['count'] == 4 and reviews['next']
+        assert len(reviews['results']) == 3
+        for review in reviews['results']:
+            assert review['comments']['count'] == 6
+            assert len(review['comments']['results']) == 2, (
+                'Проверьте, что к отзыву отдаются первые `comments` '
+                'комментариев'
+            )
+
+    def test_not_found(self, client):
+        assert client.get('/api/v1/titles/999/full/').status_code == 404
+        assert client.get('/api/v1/titles/abc/full/').status_code == 404, (
+            'Проверьте, что нечисловой id дает 404, а не ошибку сервера'
+        )
@@ -0,0 +1,43 @@
+import pytest
+from django.core.management import CommandError, call_command
+from reviews.models import Comment, Review, Title
+
+
+@pytest.mark.django_db
+class TestLoadData:
+
+    def test_load(self, csv_data):
+        call_command('load_data', path=str(csv_data), batch_size=2)
+        assert Title.objects.get(pk=1).genre.count() == 1
+        assert Comment.objects.count() == 3
+        review = Review.objects.get(pk=1)
+        assert review.pub_date.year == 2019, (
+            'Проверьте, что load_data сохраняет дату отзыва из CSV'
+        )
+        assert Title.objects.get(pk=1).rating == 4
+        assert not Title.objects.rating_drift().exists()
+
+    def test_missing_fk(self, csv_data):
+        with open(csv_data / 'comments.csv', 'a', encoding='utf-8') as f:
+            f.write('4,99,Комментарий,1,2019-09-24T21:08:21.567Z\n')
+        with pytest.raises(CommandError):
+            call_command('load_data', path=str(csv_data))
+        assert not Comment.objects.exists(), (
+            'Проверьте, что файл загружается в одной транзакции'
+        )
+
+    def test_resume(self, csv_data):
+        comments = (csv_data / 'comments.csv').read_text(encoding='utf-8')
+        with open(csv_data / 'comments.csv', 'a', encoding='utf-8') as f:
+            f.write('4,99,Комментарий,1,2019-09-24T21:08:21.567Z\n')
+        with pytest.raises(CommandError):
+            call_command('load_data', path=str(csv_data), chunk_size=1)
+        assert Comment.objects.count() == 3, (
+            'Проверьте, что части файла коммитятся по отдельности'
+        )
+        (csv_data / 'comments.csv').write_text(comments, encoding='utf-8')
+        call_command('load_data', path=str(csv_data), chunk_size=1,
+                     resume=True)
+        assert Comment.objects.count() == 3
+        assert Review.objects.count() == 3
+        assert not (csv_data / '.load_data_checkpoint.json').exists()
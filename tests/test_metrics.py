@@ -0,0 +1,71 @@
+import re
+
+import pytest
+from api.metrics import Histogram, registry
+
+
+@pytest.fixture(autouse=True)
+def clear_metrics():
+    registry.clear()
+
+
+def get_value(text, line):
+    match = re.search(rf'^{re.escape(line)} (\S+)$', text, re.M)
+    assert match, f'Проверьте, что в метриках есть строка `{line}`'
+    return float(match.group(1))
+
+
+class TestHistogram:
+
+    def test_cumulative_buckets(self):
+        histogram = Histogram((1, 5))
+        for value in (0, 1, 3, 10):
+            histogram.observe(value)
+        assert list(histogram.lines('m', 'view="v"')) == [
+            'm_bucket{view="v",le="1"} 2',
+            'm_bucket{view="v",le="5"} 3',
+            'm_bucket{view="v",le="+Inf"} 4',
+            'm_sum{view="v"} 14',
+            'm_count{view="v"} 4',
+        ]
+
+
+@pytest.mark.django_db
+class TestMetricsEndpoint:
+
+    def test_admin_only(self, client):
+        assert client.get('/api/v1/metrics/').status_code == 401
+
+    def test_records_view(self, client, admin_api_client, create_titles):
+        create_titles(2, reviews=1)
+        client.get('/api/v1/titles/')
+        client.get('/api/v1/titles/')
+        response = admin_api_client.get('/api/v1/metrics/')
+        assert response.status_code == 200
+        assert response['Content-Type'].startswith('text/plain')
+        text = response.content.decode()
+        labels = 'view="titles-list",method="GET"'
+        assert get_value(
+            text, f'yamdb_request_duration_seconds_count{{{labels}}}'
+        ) == 2
+        assert get_value(
+            text, f'yamdb_db_queries_bucket{{{labels},le="+Inf"}}'
+        ) == 2
+        # Второй ответ из кэша: SQL-запросов не было.
+        assert get_value(
+            text, f'yamdb_db_queries_bucket{{{labels},le="0"}}'
+        ) == 1
+        assert get_value(
+            text, f'yamdb_serializer_duration_seconds_sum{{{labels}}}'
+        ) > 0
+
+    def test_slow_profile(self, client, settings, tmp_path):
+        settings.METRICS = dict(
+            settings.METRICS, PROFILE_SAMPLE_RATE=1,
+            PROFILE_SLOW_SECONDS=0, PROFILE_DIR=str(tmp_path),
+        )
+        client.get('/api/v1/titles/')
+        dumps = list(tmp_path.iterdir())
+        assert len(dumps) == 1 and dumps[0].name.endswith(
+            '-GET-titles-list.prof'
+        ), 'Проверьте, что медленный запрос сохраняет профиль cProfile'
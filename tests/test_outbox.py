@@ -0,0 +1,130 @@
+import smtplib
+import threading
+from types import SimpleNamespace
+
+import pytest
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.db import connection
+from django.utils import timezone
+from reviews import mail as mail_module
+from reviews.mail import send_pending
+from reviews.models import OutgoingEmail
+
+
+@pytest.mark.django_db
+class TestEmailOutbox:
+    """Письмо с кодом уходит в очередь и отправляется отдельно от запроса."""
+
+    def signup(self, client, count):
+        for number in range(count):
+            response = client.post('/api/v1/auth/signup/', {
+                'username': f'signup{number}',
+                'email': f'signup{number}@yamdb.fake',
+            })
+            assert response.status_code == 200, (
+                'Проверьте, что регистрация возвращает статус 200'
+            )
+
+    def test_signup_enqueues(self, client):
+        self.signup(client, 1)
+        assert not mail.outbox, (
+            'Проверьте, что `send_code` не отправляет письмо в запросе'
+        )
+        assert OutgoingEmail.objects.filter(
+            recipient='signup0@yamdb.fake', status=OutgoingEmail.PENDING
+        ).exists(), 'Проверьте, что `send_code` ставит письмо в очередь'
+
+    def test_send_pending_uses_one_connection(self, client, monkeypatch):
+        self.signup(client, 3)
+        opened = []
+        original_open = EmailBackend.open
+        monkeypatch.setattr(
+            EmailBackend, 'open',
+            lambda backend: opened.append(backend) or original_open(backend)
+        )
+        assert send_pending(batch_size=10) == (3, 0)
+        assert len(mail.outbox) == 3
+        assert len(opened) == 1, (
+            'Проверьте, что пачка писем отправляется через одно соединение'
+        )
+        assert not OutgoingEmail.objects.exclude(
+            status=OutgoingEmail.SENT
+        ).exists()
+
+    def test_failed_email_is_retried(self, client, monkeypatch):
+        self.signup(client, 1)
+
+        def fail(backend, messages):
+            raise smtplib.SMTPException('Сервер недоступен')
+
+        monkeypatch.setattr(EmailBackend, 'send_messages', fail)
+        assert send_pending(max_attempts=2) == (0, 1)
+        email = OutgoingEmail.objects.get()
+        assert (email.status, email.attempts) == (OutgoingEmail.PENDING, 1), (
+            'Проверьте, что неотправленное письмо остается в очереди'
+        )
+        assert send_pending(max_attempts=2) == (0, 0), (
+            'Проверьте, что повтор ждет RETRY_SECONDS'
+        )
+        OutgoingEmail.objects.update(next_attempt=timezone.now())
+        send_pending(max_attempts=2)
+        email.refresh_from_db()
+        assert (email.status, email.error, email.body) == (
+            OutgoingEmail.FAILED, 'Сервер недоступен', ''
+        ), 'Проверьте, что после max_attempts письмо помечается ошибкой'
+
+    def test_broken_email_does_not_stop_batch(self, client, monkeypatch):
+        self.signup(client, 3)
+        broken = OutgoingEmail.objects.order_by('id').first()
+        original_send = EmailBackend.send_messages
+
+        def send(backend, messages):
+            if messages[0].to == [broken.recipient]:
+                raise ValueError('Недопустимый заголовок')
+            return original_send(backend, messages)
+
+        monkeypatch.setattr(EmailBackend, 'send_messages', send)
+        assert send_pending(batch_size=10, max_attempts=2) == (2, 1), (
+            'Проверьте, что любая ошибка письма не прерывает пачку'
+        )
+        broken.refresh_from_db()
+        assert (broken.status, broken.attempts, broken.error) == (
+            OutgoingEmail.PENDING, 1, 'Недопустимый заголовок'
+        )
+        assert OutgoingEmail.objects.filter(
+            status=OutgoingEmail.SENT
+        ).count() == 2
+
+    @pytest.mark.django_db(transaction=True)
+    def test_sent_outside_transaction(self, client, monkeypatch):
+        self.signup(client, 1)
+        in_transaction = []
+        original_send = EmailBackend.send_messages
+        monkeypatch.setattr(
+            EmailBackend, 'send_messages',
+            lambda backend, messages: in_transaction.append(
+                connection.in_atomic_block
+            ) or original_send(backend, messages)
+        )
+        assert send_pending() == (1, 0)
+        assert in_transaction == [False], (
+            'Проверьте, что письма отправляются без блокировки строк'
+        )
+        assert OutgoingEmail.objects.get().body == '', (
+            'Проверьте, что код подтверждения стирается после отправки'
+        )
+
+    def test_retry_without_new_signup(self, settings, monkeypatch):
+        settings.EMAIL_OUTBOX = dict(settings.EMAIL_OUTBOX,
+                                     RETRY_SECONDS=0.01)
+        retried = threading.Event()
+        monkeypatch.setattr(mail_module, 'send_pending', lambda: (0, 1))
+        monkeypatch.setattr(mail_module, 'connection',
+                            SimpleNamespace(close=lambda: None))
+        monkeypatch.setattr(mail_module, 'schedule_send', retried.set)
+        monkeypatch.setattr(mail_module, '_retry', None)
+        mail_module.send_in_thread()
+        assert retried.wait(5), (
+            'Проверьте, что после ошибки отправка повторяется по таймеру'
+        )
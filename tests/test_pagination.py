@@ -0,0 +1,83 @@
+import pytest
+from api.pagination import TitlePagination
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+@pytest.mark.django_db
+class TestCursorPagination:
+
+    def test_page_number_by_default(self, client, create_titles):
+        create_titles(7)
+        response = client.get('/api/v1/titles/')
+        assert response.status_code == 200
+        assert response.json()['count'] == 7, (
+            'Проверьте, что по умолчанию сохранена пагинация по номеру страницы'
+        )
+
+    def test_titles_cursor(self, client, create_titles):
+        titles = create_titles(7)
+        url = '/api/v1/titles/?pagination=cursor'
+        ids = []
+        while url:
+            with CaptureQueriesContext(connection) as context:
+                response = client.get(url)
+            assert response.status_code == 200
+            data = response.json()
+            assert 'count' not in data
+            assert not any(
+                'COUNT(' in query['sql'].upper()
+                for query in context.captured_queries
+            ), 'Проверьте, что в режиме курсора не выполняется COUNT(*)'
+            ids += [title['id'] for title in data['results']]
+            url = data['next']
+        assert ids == [title.pk for title in titles]
+
+    def test_reviews_cursor(self, client, create_titles, create_reviews):
+        title, = create_titles(1)
+        reviews = create_reviews(title, 7)
+        url = f'/api/v1/titles/{title.pk}/reviews/?pagination=cursor'
+        ids = []
+        while url:
+            data = client.get(url).json()
+            ids += [review['id'] for review in data['results']]
+            url = data['next']
+        assert ids == [review.pk for review in reviews], (
+            'Проверьте, что отзывы в режиме курсора упорядочены по дате'
+        )
+
+
+@pytest.mark.django_db
+class TestPageSize:
+
+    def test_page_size_param(self, client, create_titles):
+        create_titles(7)
+        for url in ('/api/v1/titles/?page_size=3',
+                    '/api/v1/titles/?page_size=3&pagination=cursor'):
+            results = client.get(url).json()['results']
+            assert len(results) == 3, (
+                f'Проверьте, что `{url}` учитывает параметр page_size'
+            )
+
+    def test_max_page_size(self, client, create_titles, monkeypatch):
+        monkeypatch.setattr(TitlePagination, 'max_page_size', 4)
+        create_titles(7)
+        results = client.get('/api/v1/titles/?page_size=50').json()['results']
+        assert len(results) == 4, (
+            'Проверьте, что размер страницы ограничен max_page_size'
+        )
+
+    def test_queries_do_not_grow_with_page_size(self, create_titles,
+                                                create_reviews,
+                                                queries_per_page):
+        title, = create_titles(1)
+        create_reviews(title, 30, comments=1)
+        for url in ('/api/v1/titles/', f'/api/v1/titles/{title.pk}/reviews/',
+                    f'/api/v1/titles/{title.pk}/reviews/'
+                    f'{title.reviews.first().pk}/comments/'):
+            small = queries_per_page(f'{url}?page_size=2')
+            large = queries_per_page(f'{url}?page_size=30')
+            assert small == large, (
+                f'Проверьте, что число запросов к `{url}` не зависит '
+                f'от page_size: {small} и {large}'
+            )
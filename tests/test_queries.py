@@ -0,0 +1,46 @@
+import pytest
+
+
+@pytest.mark.django_db
+class TestQueryCount:
+    """Число SQL-запросов на страницу не должно зависеть от числа строк."""
+
+    def assert_constant(self, queries_per_page, url, grow):
+        few = queries_per_page(url)
+        grow()
+        many = queries_per_page(url)
+        assert few == many, (
+            f'Проверьте, что GET-запрос к `{url}` выполняет фиксированное '
+            f'число SQL-запросов: {few} для одной строки, {many} для страницы'
+        )
+
+    def test_titles_list(self, create_titles, queries_per_page):
+        create_titles(1)
+        self.assert_constant(
+            queries_per_page, '/api/v1/titles/', lambda: create_titles(5)
+        )
+
+    def test_title_retrieve(self, create_titles, queries_per_page):
+        title, other = create_titles(2)
+        self.assert_constant(
+            queries_per_page, f'/api/v1/titles/{title.pk}/',
+            lambda: title.genre.add(*other.genre.all())
+        )
+
+    def test_reviews_list(self, create_titles, create_reviews,
+                          queries_per_page):
+        title, = create_titles(1, reviews=1)
+        self.assert_constant(
+            queries_per_page, f'/api/v1/titles/{title.pk}/reviews/',
+            lambda: create_reviews(title, 5)
+        )
+
+    def test_comments_list(self, create_titles, create_comments,
+                           queries_per_page):
+        title, = create_titles(1, reviews=1, comments=1)
+        review = title.reviews.get()
+        self.assert_constant(
+            queries_per_page,
+            f'/api/v1/titles/{title.pk}/reviews/{review.pk}/comments/',
+            lambda: create_comments(review, 5)
+        )
@@ -0,0 +1,145 @@
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+from api import middleware
+from api.cache import RedisBackend
+from api.middleware import ReplicaMiddleware
+from api.replicas import (ReplicaRouter, _read_alias, replica_may_lag,
+                          reset_replica, use_replica)
+from django.db import transaction
+from django.http import HttpResponse
+from django.test import RequestFactory
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+from reviews.models import Title
+
+from .conftest import root_dir
+
+# Второй процесс приложения: успешный POST пользователя 7.
+WRITER = """
+import os, sys
+os.environ['DJANGO_SETTINGS_MODULE'] = 'api_yamdb.settings'
+import django
+django.setup()
+from api import middleware
+from api.cache import RedisBackend
+from django.http import HttpResponse
+from django.test import RequestFactory
+from rest_framework_simplejwt.tokens import AccessToken
+middleware.auth_cache = RedisBackend(
+    sys.argv[1], {'CLIENT_CLASS': 'tests.fixtures.fake_redis.FileRedis'}
+)
+token = AccessToken()
+token['user_id'] = 7
+request = RequestFactory().post(
+    '/', HTTP_AUTHORIZATION=f'Bearer {token}'
+)
+middleware.ReplicaMiddleware(lambda request: HttpResponse(status=201))(
+    request
+)
+"""
+
+
+def bearer(user_id):
+    token = AccessToken()
+    token[api_settings.USER_ID_CLAIM] = user_id
+    return {'HTTP_AUTHORIZATION': f'Bearer {token}'}
+
+
+@pytest.fixture
+def replica(settings):
+    settings.DATABASES = dict(
+        settings.DATABASES, replica_1=settings.DATABASES['default']
+    )
+    return 'replica_1'
+
+
+@pytest.mark.django_db(transaction=True)
+class TestReplicaRouter:
+
+    def test_read_alias(self, replica):
+        router = ReplicaRouter()
+        assert router.db_for_read(Title) == 'default', (
+            'Проверьте, что вне запроса чтение идет в default'
+        )
+        token = use_replica(replica)
+        try:
+            assert router.db_for_read(Title) == replica
+            assert router.db_for_write(Title) == 'default'
+            with transaction.atomic():
+                assert router.db_for_read(Title) == 'default', (
+                    'Проверьте, что внутри транзакции чтение идет в default'
+                )
+        finally:
+            reset_replica(token)
+
+    def test_may_lag(self, replica):
+        assert not replica_may_lag(time.time())
+        token = use_replica(replica)
+        try:
+            assert replica_may_lag(time.time())
+            assert not replica_may_lag(time.time() - 60)
+            assert not replica_may_lag(None)
+        finally:
+            reset_replica(token)
+
+
+class TestReplicaMiddleware:
+
+    def call(self, method, status=200, **headers):
+        used = []
+
+        def get_response(request):
+            used.append(_read_alias.get())
+            return HttpResponse(status=status)
+
+        request = getattr(RequestFactory(), method)('/', **headers)
+        ReplicaMiddleware(get_response)(request)
+        return used[0]
+
+    def test_sticky_after_write(self, replica):
+        writer = bearer(1)
+        other = bearer(2)
+        assert self.call('get', **writer) == replica
+        assert self.call('post', status=400, **writer) is None
+        assert self.call('get', **writer) == replica, (
+            'Проверьте, что неудачная запись не закрепляет клиента за default'
+        )
+        assert self.call('post', status=201, **writer) is None
+        assert self.call('get', **writer) is None, (
+            'Проверьте, что после записи клиент читает из default'
+        )
+        assert self.call('get', **bearer(1)) is None, (
+            'Проверьте, что новый токен того же пользователя тоже '
+            'читает из default'
+        )
+        assert self.call('get', **other) == replica
+        assert self.call('get') == replica
+        assert self.call('get', HTTP_AUTHORIZATION='Bearer bad') == replica
+
+    def test_two_processes(self, replica, tmp_path, monkeypatch):
+        location = f'redis://{tmp_path}/redis'
+        monkeypatch.setattr(middleware, 'auth_cache', RedisBackend(
+            location, {'CLIENT_CLASS': 'tests.fixtures.fake_redis.FileRedis'}
+        ))
+        # Запись обрабатывает другой процесс приложения.
+        subprocess.run([sys.executable, '-c', WRITER, location],
+                       check=True, cwd=root_dir, env=dict(
+                           os.environ, DB_REPLICAS=str(tmp_path / 'replica'),
+                           DB_ENGINE='django.db.backends.sqlite3',
+                           DB_NAME=str(tmp_path / 'default'),
+                           PYTHONPATH=os.pathsep.join(
+                               [os.path.join(root_dir, 'api_yamdb'), root_dir]
+                           ),
+                       ))
+        assert self.call('get', **bearer(7)) is None, (
+            'Проверьте, что запись в одном процессе закрепляет чтение '
+            'пользователя за default и в другом'
+        )
+        assert self.call('get', **bearer(8)) == replica
+
+    def test_without_replicas(self):
+        assert self.call('get') is None
@@ -0,0 +1,47 @@
+import pytest
+from django.db import connection
+from reviews.models import Category, Title
+
+
+@pytest.mark.django_db
+class TestNameSearch:
+
+    def test_title_name_filter(self, client, create_titles):
+        first, second = create_titles(2)
+        first.name = 'Властелин колец'
+        first.save()
+        second.name = 'Кольцо'
+        second.save()
+        response = client.get('/api/v1/titles/?name=Властелин')
+        assert [title['id'] for title in response.json()['results']] == [
+            first.pk
+        ], 'Проверьте фильтрацию произведений по части названия'
+
+    def test_category_search(self, client):
+        Category.objects.create(name='Фильм', slug='movie')
+        Category.objects.create(name='Книга', slug='book')
+        response = client.get('/api/v1/categories/?search=Фил')
+        assert [item['slug'] for item in response.json()['results']] == [
+            'movie'
+        ], 'Проверьте поиск категорий по части названия'
+
+    @pytest.mark.parametrize('url', [
+        '/api/v1/titles/?name=Мир&pagination=cursor',
+        '/api/v1/categories/?search=Фил&pagination=cursor',
+    ])
+    def test_cursor_rejected(self, client, url):
+        response = client.get(url)
+        assert response.status_code == 400, (
+            'Проверьте, что поиск с ранжированием не сочетается с курсором'
+        )
+        assert 'pagination' in response.json()
+
+    @pytest.mark.skipif(connection.vendor != 'postgresql',
+                        reason='Ранжирование работает только в PostgreSQL')
+    def test_ranked_by_similarity(self, client):
+        for name in ('Война и мир и другие', 'Мир', 'Мир прекрасен'):
+            Title.objects.create(name=name, year=2000)
+        response = client.get('/api/v1/titles/?name=Мир')
+        assert response.json()['results'][0]['name'] == 'Мир', (
+            'Проверьте, что самое похожее название выдается первым'
+        )
@@ -0,0 +1,52 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from reviews.models import OutgoingEmail
+
+
+@pytest.mark.django_db
+class TestSignupQueries:
+    """Регистрация и получение токена не переписывают строку пользователя."""
+
+    def post(self, client, url, data):
+        with CaptureQueriesContext(connection) as context:
+            response = client.post(url, data)
+        return response, [query['sql'] for query in context]
+
+    def signup(self, client, username='signup', email='signup@yamdb.fake'):
+        return self.post(client, '/api/v1/auth/signup/',
+                         {'username': username, 'email': email})
+
+    def test_repeat_signup_does_not_write_user(self, client):
+        self.signup(client)
+        response, queries = self.signup(client)
+        assert response.status_code == 200
+        assert len(queries) == 2, (
+            'Проверьте, что повторная регистрация выполняет один запрос '
+            'к пользователям и одну запись в очередь писем'
+        )
+        assert not any(sql.startswith('UPDATE') for sql in queries), (
+            'Проверьте, что повторная регистрация не обновляет пользователя'
+        )
+
+    def test_signup_conflicts(self, client):
+        self.signup(client)
+        response, _ = self.signup(client, email='other@yamdb.fake')
+        assert 'email' in response.json()
+        response, _ = self.signup(client, username='other')
+        assert 'user' in response.json()
+
+    def test_code_is_single_use(self, client):
+        self.signup(client)
+        code = OutgoingEmail.objects.get().body
+        data = {'username': 'signup', 'confirmation_code': code}
+        response, queries = self.post(client, '/api/v1/auth/token/', data)
+        assert 'access' in response.json()
+        assert len(queries) == 2, (
+            'Проверьте, что выдача токена читает пользователя и обновляет '
+            'только last_login'
+        )
+        response, _ = self.post(client, '/api/v1/auth/token/', data)
+        assert response.status_code == 400, (
+            'Проверьте, что код подтверждения нельзя использовать дважды'
+        )
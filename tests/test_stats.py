@@ -0,0 +1,96 @@
+import pytest
+from reviews.models import Review, Title, TitleStats
+
+
+@pytest.mark.django_db
+class TestTitleStats:
+    """Статистика оценок берется из таблицы TitleStats."""
+
+    def test_histogram(self, client, create_titles):
+        title, = create_titles(1, reviews=4)
+        scores = sorted(title.reviews.values_list('score', flat=True))
+        data = client.get(f'/api/v1/titles/{title.pk}/stats/').json()
+        assert data['count'] == 4
+        assert data['mean'] == round(sum(scores) / 4, 2)
+        assert data['median'] == (scores[1] + scores[2]) / 2, (
+            'Проверьте, что при четном числе оценок медиана - среднее двух '
+            'средних оценок'
+        )
+        assert data['histogram'] == {
+            str(score): scores.count(score) for score in range(1, 11)
+        }
+
+    def test_empty_and_missing(self, client, create_titles):
+        title, = create_titles(1)
+        data = client.get(f'/api/v1/titles/{title.pk}/stats/').json()
+        assert data['count'] == 0
+        assert data['mean'] is None and data['median'] is None
+        assert client.get('/api/v1/titles/999/stats/').status_code == 404
+        assert client.get('/api/v1/titles/abc/stats/').status_code == 404, (
+            'Проверьте, что нечисловой id дает 404, а не ошибку сервера'
+        )
+
+    def test_follows_reviews(self, admin_api_client, create_titles):
+        title, = create_titles(1)
+        url = f'/api/v1/titles/{title.pk}/reviews/'
+        review = admin_api_client.post(
+            url, {'text': 'Отзыв', 'score': 7}
+        ).json()
+        stats = TitleStats.objects.get(pk=title.pk)
+        assert stats.score_7 == 1, (
+            'Проверьте, что новый отзыв попадает в гистограмму'
+        )
+        admin_api_client.patch(f'{url}{review["id"]}/', {'score': 9})
+        stats.refresh_from_db()
+        assert (stats.score_7, stats.score_9) == (0, 1)
+        admin_api_client.delete(f'{url}{review["id"]}/')
+        stats.refresh_from_db()
+        assert stats.score_9 == 0
+
+    def test_follows_model_changes(self, create_titles):
+        title, = create_titles(1, reviews=3)
+        first, second, third = title.reviews.order_by('pk')
+        second.score = 10 if second.score != 10 else 1
+        second.save()
+        other, = create_titles(1)
+        third.title = other
+        third.save()
+        first.author.delete()
+        for item in (title, other):
+            item = Title.objects.with_actual_rating().get(pk=item.pk)
+            assert (item.rating_sum, item.rating_count) == (
+                item.actual_sum, item.actual_count
+            ), (
+                'Проверьте, что рейтинг меняется при любом сохранении и '
+                'удалении отзыва, в том числе каскадном вместе с автором'
+            )
+        scores = TitleStats.objects.get(pk=title.pk)
+        assert getattr(scores, f'score_{second.score}') == 1
+        assert sum(getattr(scores, f'score_{score}')
+                   for score in range(1, 11)) == 1
+
+    def test_rebuild(self, create_titles):
+        title, = create_titles(1, reviews=1)
+        Review.objects.filter(title=title).update(score=10)
+        TitleStats.objects.rebuild()
+        stats = TitleStats.objects.get(pk=title.pk)
+        assert stats.score_10 == 1 and stats.score_1 == 0
+
+    def test_bulk(self, client, create_titles, create_reviews,
+                  queries_per_page):
+        first, second = create_titles(2, reviews=1)
+        url = f'/api/v1/titles/stats/?ids={second.pk},{first.pk},999'
+        few = queries_per_page(url)
+        create_reviews(first, 5)
+        assert queries_per_page(url) == few
+        data = client.get(url).json()
+        assert [row['id'] for row in data] == [second.pk, first.pk]
+        assert data[1]['count'] == 6
+
+    @pytest.mark.parametrize(
+        'ids', ['', 'a,1', ','.join(str(pk) for pk in range(1, 102))],
+        ids=['empty', 'not-int', 'too-many'],
+    )
+    def test_bulk_invalid(self, client, ids):
+        response = client.get(f'/api/v1/titles/stats/?ids={ids}')
+        assert response.status_code == 400
@@ -0,0 +1,123 @@
+import pytest
+from api import throttling
+from api.cache import RedisBackend
+from api.throttling import SlidingWindow, TokenBucket
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+class FrozenTime:
+
+    def __init__(self, now):
+        self.now = now
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def frozen_time(monkeypatch):
+    clock = FrozenTime(999960.0)
+    monkeypatch.setattr(throttling, 'time', clock)
+    return clock
+
+
+@pytest.fixture
+def redis_backend():
+    return RedisBackend('redis://localhost:6379/0',
+                        {'CLIENT_CLASS': 'tests.fixtures.fake_redis.FakeRedis'})
+
+
+class TestAlgorithms:
+
+    def test_sliding_window(self, redis_backend, frozen_time):
+        window = SlidingWindow(redis_backend, limit=2, period=60)
+        assert [window.hit('k') for _ in range(2)] == [None, None]
+        assert window.hit('k') is not None, (
+            'Проверьте, что скользящее окно не пропускает запрос сверх лимита'
+        )
+        frozen_time.now += 60
+        assert window.hit('k') is not None, (
+            'Проверьте, что в начале окна учитываются запросы прошлого окна'
+        )
+        frozen_time.now += 60
+        assert window.hit('k') is None
+
+    def test_token_bucket(self, redis_backend, frozen_time):
+        bucket = TokenBucket(redis_backend, limit=3, period=60)
+        assert [bucket.hit('k') for _ in range(3)] == [None] * 3
+        assert bucket.hit('k') == pytest.approx(20), (
+            'Проверьте, что ведро токенов возвращает время до нового токена'
+        )
+        frozen_time.now += 20
+        assert bucket.hit('k') is None
+        assert bucket.hit('k') is not None
+
+
+@pytest.mark.django_db
+class TestAuthThrottles:
+
+    def signup(self, client, number, ip='10.0.0.1'):
+        return client.post('/api/v1/auth/signup/', {
+            'username': f'flood{number}', 'email': 'flood@yamdb.fake',
+        }, REMOTE_ADDR=ip)
+
+    def test_signup_is_limited_by_email(self, client, settings):
+        settings.AUTH_THROTTLES = {'send_code': {
+            'ALGORITHM': 'api.throttling.TokenBucket',
+            'RATES': {'ip': '100/h', 'email': '2/h'},
+        }}
+        for number in range(2):
+            self.signup(client, 0, ip=f'10.0.0.{number}')
+        with CaptureQueriesContext(connection) as context:
+            response = self.signup(client, 1, ip='10.0.0.9')
+        assert response.status_code == 429, (
+            'Проверьте, что частые регистрации на один email получают 429'
+        )
+        assert 'Retry-After' in response
+        assert not context, (
+            'Проверьте, что отклоненный запрос не обращается к БД'
+        )
+
+    @pytest.mark.parametrize('url', ['signup', 'token'])
+    @pytest.mark.parametrize('body', ['[]', '"flood"', '1'])
+    def test_not_object_body(self, client, url, body):
+        response = client.post(f'/api/v1/auth/{url}/', body,
+                               content_type='application/json')
+        assert response.status_code == 400, (
+            'Проверьте, что тело не-объект дает ошибку валидации, а не 500'
+        )
+
+    def test_token_is_limited_by_ip(self, client, settings):
+        settings.AUTH_THROTTLES = {'get_jwt': {
+            'ALGORITHM': 'api.throttling.SlidingWindow',
+            'RATES': {'ip': '2/m'},
+        }}
+        statuses = [
+            client.post('/api/v1/auth/token/', {
+                'username': f'user{number}', 'confirmation_code': 'x',
+            }).status_code
+            for number in range(3)
+        ]
+        assert statuses == [404, 404, 429]
+
+    def test_ip_from_proxy(self, client, settings):
+        settings.AUTH_THROTTLES = {'get_jwt': {
+            'ALGORITHM': 'api.throttling.SlidingWindow',
+            'RATES': {'ip': '2/m'},
+        }}
+
+        def token(forwarded):
+            return client.post('/api/v1/auth/token/', {
+                'username': 'nobody', 'confirmation_code': 'x',
+            }, HTTP_X_FORWARDED_FOR=forwarded).status_code
+
+        statuses = [token(f'1.1.1.{number}, 10.0.0.7')
+                    for number in range(3)]
+        assert statuses == [404, 404, 429], (
+            'Проверьте, что адрес, подставленный клиентом в '
+            'X-Forwarded-For, не обходит ограничение'
+        )
+        assert token('1.1.1.1, 10.0.0.8') == 404, (
+            'Проверьте, что клиенты за nginx ограничиваются по своему адресу'
+        )
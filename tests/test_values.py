@@ -0,0 +1,45 @@
+import pytest
+from api.renderers import ORJSONRenderer
+from api.serializers import (CommentsSerializer, GetTitleSerializer,
+                             ReviewsSerializer)
+from api.values import (CommentValuesSerializer, ReviewValuesSerializer,
+                        TitleValuesSerializer)
+from api.views import TitleViewSet
+from rest_framework.renderers import JSONRenderer
+from reviews.models import Comment, Review, Title
+
+
+@pytest.mark.django_db
+class TestValuesSerializers:
+    """Быстрые сериализаторы выдают тот же JSON байт в байт."""
+
+    def assert_same(self, queryset, serializer, values_serializer):
+        expected = JSONRenderer().render(serializer(queryset, many=True).data)
+        actual = ORJSONRenderer().render(
+            values_serializer(values_serializer.values(queryset)).data
+        )
+        assert actual == expected, (
+            f'Проверьте, что {values_serializer.__name__} выдает тот же '
+            f'JSON, что и {serializer.__name__}'
+        )
+
+    def test_titles(self, create_titles):
+        create_titles(2, reviews=3)
+        Title.objects.create(name='Без категории «и жанра»', year=1990,
+                             description='Строка\u2028с "кавычками"')
+        self.assert_same(TitleViewSet.queryset.order_by('pk'),
+                         GetTitleSerializer, TitleValuesSerializer)
+
+    def test_reviews_and_comments(self, create_titles):
+        create_titles(1, reviews=2, comments=2)
+        self.assert_same(Review.objects.order_by('pk'),
+                         ReviewsSerializer, ReviewValuesSerializer)
+        self.assert_same(Comment.objects.order_by('pk'),
+                         CommentsSerializer, CommentValuesSerializer)
+
+    def test_renderer_fallbacks(self):
+        data = {1: 'один', 'list': (1, 2.5, None)}
+        assert ORJSONRenderer().render(data) == JSONRenderer().render(data)
+        assert ORJSONRenderer().render(
+            data, renderer_context={'indent': 4}
+        ) == JSONRenderer().render(data, renderer_context={'indent': 4})